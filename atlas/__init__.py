@@ -1 +1,2 @@
 from .atlas import *
+from .tracking import log_metric, log_metrics
@@ -1,5 +1,4 @@
 import errno
-import json
 import os
 import subprocess
 from sys import platform
@@ -9,8 +8,12 @@ import click
 from packaging.version import Version
 
 from atlas.atlas_manager import AtlasManager
-from atlas.atlas_pipeline import AtlasPipeline
+from atlas.atlas_pipeline import AtlasPipeline, AtlasPipelineError
+from atlas.atlas_watcher import AtlasWatcher
 from atlas.load_config import ConfigValidationError, load_config_file
+from atlas.model import AtlasModelError, ModelVersion, get_storage
+from atlas.model_bundle import export_bundle, import_bundle
+from atlas.telemetry import REGISTRY, configure_telemetry
 from atlas.utils.atlas_config import ATLAS_HIDDEN_DIRECTORY
 
 from .utils.system_utils import get_root_dir
@@ -122,19 +125,38 @@ def stage_output() -> None:
     return None
 
 
-@atlas.command("model")
+class DefaultCommandGroup(click.Group):
+    """Click group that runs a default command when no subcommand is given"""
+
+    def __init__(self, *args, default_command: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if not args or (args[0] not in self.commands and args[0] != "--help"):
+            args.insert(0, self.default_command)
+        return super().parse_args(ctx, args)
+
+
+@atlas.group("model", cls=DefaultCommandGroup, default_command="list")
+def model() -> None:
+    """Manage the models in the model repository."""
+    return None
+
+
+@model.command("list")
 @click.argument("model_name", required=False)
 @click.option("-v", "--version", help="Model version")
 @click.option("-n", "--num", type=int, help="Get last n model versions")
 @click.option(
     "--verbose", is_flag=True, help="Print out model parameters and performance metrics"
 )
-def model(
+def model_list(
     model_name: Optional[str], version: Optional[str], num: int, verbose: bool
 ) -> None:
     """Prints out a list of the models in the model repository."""
-    model_repository_path = os.path.join(root_hidden_file, "model_repository")
-    if not os.path.isdir(model_repository_path):
+    storage = get_storage()
+    if not storage.is_available():
         click.echo(
             click.style("ERROR", fg="red") + ": Failed to find atlas model repository"
         )
@@ -142,7 +164,7 @@ def model(
 
     models = []
     if model_name:
-        if not os.path.isdir(os.path.join(model_repository_path, model_name)):
+        if not storage.has_model(model_name):
             click.echo(
                 click.style("ERROR", fg="red")
                 + f": Failed to find model {model_name} in atlas model repository"
@@ -150,31 +172,29 @@ def model(
             return
         models.append(model_name)
     else:
-        models = os.listdir(model_repository_path)
+        models = storage.list_models()
 
     if not models:
         click.secho("No models found in atlas model repository", fg="yellow")
         return
 
     for model in models:
-        model_path = os.path.join(model_repository_path, model)
         click.secho(model, fg="yellow")
 
-        model_versions = os.listdir(model_path)
+        model_versions = storage.list_versions(model)
         model_versions.sort(key=Version, reverse=True)
         lastest_version = model_versions[0]
 
         if version:
-            if not os.path.isdir(os.path.join(model_path, version)):
+            model_version = lastest_version if version == "latest" else version
+            if model_version not in model_versions:
                 click.echo(
                     click.style("ERROR", fg="red")
                     + f": Failed to find {model} {version} in atlas model repository"
                 )
                 continue
-            if version == "latest":
-                version = lastest_version
 
-            model_versions = [version]
+            model_versions = [model_version]
         else:
             if num:
                 model_versions = model_versions[:num]
@@ -189,25 +209,88 @@ def model(
             else:
                 click.echo("-> " + click.style(model_version, fg="bright_cyan"))
             if verbose:
-                model_infos = ["parameters", "metrics", "gems"]
-                for model_info in model_infos:
-                    info_path = os.path.join(
-                        model_path, model_version, model_info + ".json"
-                    )
-                    if not os.path.isfile(info_path):
+                model_handle = ModelVersion(model, model_version)
+                click.echo(
+                    f"->-> Created: {model_handle.created_at:%Y-%m-%d %H:%M:%S}, "
+                    f"Size: {model_handle.size_bytes} bytes"
+                )
+                model_infos = {
+                    "parameters": model_handle.parameters,
+                    "metrics": model_handle.metrics,
+                    "gems": model_handle.gems,
+                    "run": (
+                        {"run_id": model_handle.run_id} if model_handle.run_id else {}
+                    ),
+                }
+                for model_info, info_dict in model_infos.items():
+                    if not info_dict:
                         continue
 
-                    with open(info_path, "r") as file:
-                        info_dict = json.load(file)
-
                     click.echo(f"->-> {model_info.capitalize()}: {info_dict}")
 
     return
 
 
+@model.command("export")
+@click.argument("model_name")
+@click.option(
+    "-v",
+    "--version",
+    "versions",
+    multiple=True,
+    help="Model version to export, can be repeated (default: all versions)",
+)
+@click.option(
+    "-o", "--output", required=True, help="Path of the bundle, or - for stdout"
+)
+@click.option("--compress", is_flag=True, help="Compress the files in the bundle")
+def model_export(
+    model_name: str, versions: tuple[str, ...], output: str, compress: bool
+) -> None:
+    """Export model versions into a single bundle file."""
+    try:
+        with click.open_file(output, "wb") as bundle:
+            index = export_bundle(model_name, bundle, list(versions), compress)
+    except AtlasModelError as err:
+        click.echo(click.style("ERROR", fg="red") + f": {str(err)}", err=True)
+        return
+
+    exported_versions = [version_info["version"] for version_info in index["versions"]]
+    click.secho(
+        f"Exported {model_name} {', '.join(exported_versions)} to {output}",
+        fg="green",
+        err=True,
+    )
+
+
+@model.command("import")
+@click.argument("bundle_path")
+def model_import(bundle_path: str) -> None:
+    """Import the model versions in a bundle file, or - for stdin."""
+    try:
+        with click.open_file(bundle_path, "rb") as bundle:
+            import_bundle(bundle)
+    except (AtlasModelError, FileNotFoundError) as err:
+        click.echo(click.style("ERROR", fg="red") + f": {str(err)}")
+
+
 @atlas.command("run")
 @click.argument("stage_name", default=None)
-def run(stage_name) -> None:
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and re-run changed stages and their downstream stages",
+)
+@click.option(
+    "--interval", type=float, default=0.25, help="Seconds between file change polls"
+)
+@click.option(
+    "--debounce",
+    type=float,
+    default=0.5,
+    help="Seconds without changes before re-running in watch mode",
+)
+def run(stage_name, watch: bool, interval: float, debounce: float) -> None:
     """Run the script for a particular stage or all stages."""
     try:
         config_info = load_config_file()
@@ -222,30 +305,108 @@ def run(stage_name) -> None:
 
     project_stages = config_info["pipeline"]["stages"]
 
-    if stage_name == "all":
-        atlas_pipeline = AtlasPipeline(project_stages)
-        atlas_pipeline.run_atlas()
-        click.secho("Pipeline Run: Successful.", fg="green")
-    else:
-        if stage_name not in project_stages:
-            click.secho(
-                f"Error: The specified stage '{stage_name}' does not exist! Re-check the stage name.",
-                fg="red",
-            )
-            return
+    if stage_name != "all" and stage_name not in project_stages:
+        click.secho(
+            f"Error: The specified stage '{stage_name}' does not exist! Re-check the stage name.",
+            fg="red",
+        )
+        return
 
-        stage_info = project_stages[stage_name]
-        script_ = stage_info["script"]
-        click.secho(f"Running {stage_name} stage ...")
+    try:
+        atlas_pipeline = AtlasPipeline(
+            project_stages, config_info["pipeline"].get("concurrency")
+        )
+    except AtlasPipelineError as err:
+        click.echo(click.style("ERROR", fg="red") + f": {str(err)}")
+        return
+
+    textfile_path = configure_telemetry(config_info.get("telemetry"))
+    if watch:
+        if stage_name == "all":
+            watched_stages = atlas_pipeline.execution_order()
+        else:
+            watched_stages = atlas_pipeline.downstream_stages([stage_name])
+        atlas_watcher = AtlasWatcher(
+            atlas_pipeline, watched_stages, interval, debounce, textfile_path
+        )
         try:
-            click.secho(f"Running script: {script_} in {stage_name} stage.")
-            with open(script_) as module:
-                exec(module.read())
+            atlas_watcher.watch()
+        except KeyboardInterrupt:
+            click.secho("Stopped watching.", fg="yellow")
+        return
+
+    try:
+        if stage_name == "all":
+            atlas_pipeline.run_atlas()
+            click.secho("Pipeline Run: Successful.", fg="green")
+        else:
+            click.secho(f"Running {stage_name} stage ...")
+            atlas_pipeline.run_stages([stage_name])
             click.secho(f"{stage_name} run: Successful.", fg="green")
-            return
-        except BaseException as error_message:
-            click.secho(f"|{stage_name}| failed.", fg="red")
-            click.secho(f"Error: {error_message}", fg="red")
+    except AtlasPipelineError as error_message:
+        click.secho(str(error_message), fg="red")
+    finally:
+        if textfile_path:
+            REGISTRY.write_textfile(textfile_path)
+
+
+@atlas.command("plan")
+@click.argument("stage_name", default="all")
+def plan(stage_name) -> None:
+    """Print the execution plan for a particular stage or all stages."""
+    try:
+        config_info = load_config_file()
+    except FileNotFoundError:
+        click.echo(
+            click.style("ERROR", fg="red") + ": Unable to find atlas-config.yaml file"
+        )
+        return
+    except ConfigValidationError as err:
+        click.echo(click.style("ERROR", fg="red") + f": {str(err)}")
+        return
+
+    project_stages = config_info["pipeline"]["stages"]
+    if stage_name != "all" and stage_name not in project_stages:
+        click.secho(
+            f"Error: The specified stage '{stage_name}' does not exist! Re-check the stage name.",
+            fg="red",
+        )
+        return
+
+    try:
+        atlas_pipeline = AtlasPipeline(
+            project_stages, config_info["pipeline"].get("concurrency")
+        )
+        if stage_name == "all":
+            planned_stages = atlas_pipeline.execution_order()
+        else:
+            planned_stages = atlas_pipeline.downstream_stages([stage_name])
+    except AtlasPipelineError as err:
+        click.echo(click.style("ERROR", fg="red") + f": {str(err)}")
+        return
+
+    click.echo("Execution levels:")
+    for level, level_stages in enumerate(
+        atlas_pipeline.execution_levels(planned_stages)
+    ):
+        level_stages = [
+            (
+                f"{name} ({len(atlas_pipeline.stages[name].variants)} variants)"
+                if atlas_pipeline.stages[name].variants
+                else name
+            )
+            for name in level_stages
+        ]
+        click.echo(f"-> {level}: " + click.style(", ".join(level_stages), fg="yellow"))
+
+    critical_path = atlas_pipeline.critical_path(planned_stages)
+    click.echo(
+        f"Critical path ({len(critical_path)} stages): " + " -> ".join(critical_path)
+    )
+    num_stages = sum(
+        len(atlas_pipeline.stages[name].variants) or 1 for name in planned_stages
+    )
+    click.echo(f"Stages to run: {num_stages}")
 
 
 def main():
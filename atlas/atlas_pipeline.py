@@ -1,29 +1,140 @@
+import asyncio
+import contextlib
+import importlib
+import importlib.util
+import inspect
+import json
+import os
+import subprocess
+import sys
+import traceback
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Iterator, Optional
 
 import click
 
+from atlas.matrix import (
+    STAGE_PARAMS_ENV,
+    VARIANT_RESULTS_ENV,
+    expand_matrix,
+    init_variant_results,
+    reset_variant_results,
+    variant_context,
+    variant_name,
+)
+from atlas.telemetry import REGISTRY
+from atlas.tracking import start_run, variant_run
+from atlas.utils.system_utils import get_root_dir
+
+DEFAULT_CONCURRENCY = 8
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "atlas_stage_duration_seconds", "Time spent running a stage.", ["stage"]
+)
+STAGE_RUNS = REGISTRY.counter(
+    "atlas_stage_runs_total", "Stage runs, by stage and status.", ["stage", "status"]
+)
+
+
+def _add_project_to_path() -> None:
+    """Makes modules in the project directory importable by `entry` stages, which the
+    `atlas` console script doesn't do by itself."""
+    root_dir = get_root_dir()
+    if root_dir not in sys.path:
+        sys.path.insert(0, root_dir)
+
 
 class AtlasPipelineError(Exception):
     """Error when calling atlas pipeline class functions"""
 
 
+@contextlib.contextmanager
+def _observe_stage(stage_name: str) -> Iterator[None]:
+    """Records the duration and the outcome of a stage run in the atlas metrics."""
+    try:
+        with STAGE_SECONDS.time(stage=stage_name):
+            yield
+    except BaseException:
+        STAGE_RUNS.inc(stage=stage_name, status="failure")
+        raise
+    STAGE_RUNS.inc(stage=stage_name, status="success")
+
+
 class AtlasStage:
     """Atlas Stage Class Object"""
 
-    def __init__(self, stage_name: str, script: str, next_stages: list[str]):
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        stage_name: str,
+        script: str,
+        next_stages: list[str],
+        inputs: Optional[list[str]] = None,
+        matrix: Optional[dict[str, list[Any]]] = None,
+        parallelism: Optional[int] = None,
+        entry: Optional[str] = None,
+    ):
         self.stage_name = stage_name
         self.script = script
+        self.entry = entry
         self.next_stages = next_stages
+        self.inputs = inputs or []
+        self.variants = expand_matrix(matrix) if matrix else []
+        self.parallelism = parallelism or os.cpu_count() or 1
+
+    @property
+    def entry_module(self) -> Optional[str]:
+        """Module of the `module:function` entry of the stage, if any."""
+        return self.entry.partition(":")[0] if self.entry else None
+
+    @property
+    def source_path(self) -> Optional[str]:
+        """Path of the file containing the stage code."""
+        if not self.entry:
+            return self.script
+        _add_project_to_path()
+        try:
+            spec = importlib.util.find_spec(self.entry_module)
+        except (ImportError, ValueError):
+            return None
+        return spec.origin if spec else None
+
+    def load_entry(self) -> Callable[[], Any]:
+        """Callable function that imports the `module:function` entry of the stage.
+
+        Returns
+        -------
+        : Callable[[], Any]
+        """
+        module_name, _, attribute_path = self.entry.partition(":")
+        _add_project_to_path()
+        try:
+            entry_callable = importlib.import_module(module_name)
+            for attribute in attribute_path.split("."):
+                entry_callable = getattr(entry_callable, attribute)
+        except (ImportError, AttributeError) as err:
+            raise AtlasPipelineError(
+                f"Failed to load entry '{self.entry}' of |{self.stage_name}| stage: {err}"
+            )
+        return entry_callable
 
 
 class AtlasPipeline:
     """Atlas Pipeline Class object."""
 
-    def __init__(self, project_stages: dict[str, AtlasStage]):
+    def __init__(
+        self,
+        project_stages: dict[str, AtlasStage],
+        concurrency: Optional[int] = None,
+    ):
         self.stages: dict[str, AtlasStage] = {}
         self.root_stage: AtlasStage = None
+        self.root_stages: list[AtlasStage] = []
+        self.topological_order: list[str] = []
         self.project_stages = project_stages
+        self.concurrency = concurrency or DEFAULT_CONCURRENCY
         self.initialize_run_pipeline()
+        self.compile_pipeline()
 
     def __iter__(self):
         return iter(self.stages.values())
@@ -42,11 +153,26 @@ class AtlasPipeline:
         stage_script = stage_info.get("script")
         next_stages = stage_info.get("next_stages")
 
+        stage_inputs = stage_info.get("inputs")
+        stage_matrix = stage_info.get("matrix")
+        stage_parallelism = stage_info.get("parallelism")
+        stage_entry = stage_info.get("entry")
+
         root_stage = stage_info.get("root")
-        atlas_stage = AtlasStage(stage_name, stage_script, next_stages)
+        atlas_stage = AtlasStage(
+            stage_name,
+            stage_script,
+            next_stages,
+            stage_inputs,
+            stage_matrix,
+            stage_parallelism,
+            stage_entry,
+        )
 
         if root_stage:
-            self.root_stage = atlas_stage
+            if self.root_stage is None:
+                self.root_stage = atlas_stage
+            self.root_stages.append(atlas_stage)
         self.stages[stage_name] = atlas_stage
 
     def initialize_run_pipeline(self) -> None:
@@ -56,6 +182,116 @@ class AtlasPipeline:
                 continue
             self._add_stage(stage, self.project_stages[stage])
 
+    def _children(self, stage_name: str) -> list[str]:
+        """Internal function that returns the de-duplicated next stages of a stage.
+
+        Parameters
+        ----------
+        stage_name: str
+          Name of stage.
+
+        Returns
+        -------
+        : list[str]
+        """
+        return list(dict.fromkeys(self.stages[stage_name].next_stages or []))
+
+    def compile_pipeline(self) -> None:
+        """Callable function that compiles the stages into a topological order using
+        in-degree counting, so every stage comes after all of its parents."""
+        in_degree = dict.fromkeys(self.stages, 0)
+        for stage_name in self.stages:
+            for next_stage in self._children(stage_name):
+                if next_stage not in self.stages:
+                    raise AtlasPipelineError(
+                        f"Stage '{stage_name}' references unknown next stage '{next_stage}'."
+                    )
+                in_degree[next_stage] += 1
+
+        topological_order = [name for name, degree in in_degree.items() if degree == 0]
+        # The list doubles as the queue: stages are appended once all parents are seen.
+        for stage_name in topological_order:
+            for next_stage in self._children(stage_name):
+                in_degree[next_stage] -= 1
+                if in_degree[next_stage] == 0:
+                    topological_order.append(next_stage)
+
+        if len(topological_order) != len(self.stages):
+            cyclic_stages = [name for name, degree in in_degree.items() if degree > 0]
+            raise AtlasPipelineError(
+                f"Pipeline contains a cycle through stages: {', '.join(cyclic_stages)}"
+            )
+        self.topological_order = topological_order
+
+    def _run_variant(
+        self, stage_obj: AtlasStage, index: int, params: dict[str, Any]
+    ) -> subprocess.CompletedProcess:
+        """Internal function that runs one variant of a matrix stage in its own
+        interpreter, passing the variant parameters through the environment.
+
+        Parameters
+        ----------
+        stage_obj: AtlasStage
+          AtlasStage Class object
+
+        index: int
+          Index of the variant
+
+        params: dict[str, Any]
+          Parameters of the variant
+        """
+        results_path = init_variant_results(stage_obj.stage_name, index, params)
+        env = dict(os.environ)
+        env[STAGE_PARAMS_ENV] = json.dumps(params)
+        env[VARIANT_RESULTS_ENV] = results_path
+        return subprocess.run(
+            [sys.executable, stage_obj.script],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+
+    def _run_matrix_stage(self, stage_obj: AtlasStage) -> None:
+        """Internal function that runs all variants of a matrix stage concurrently,
+        at most `parallelism` at a time.
+
+        Parameters
+        ----------
+        stage_obj: AtlasStage
+          AtlasStage Class object
+        """
+        reset_variant_results(stage_obj.stage_name)
+
+        print(
+            f"Running {len(stage_obj.variants)} variants of script: {stage_obj.script} "
+            f"in |{stage_obj.stage_name}| stage."
+        )
+        failed_variants = []
+        with ThreadPoolExecutor(max_workers=stage_obj.parallelism) as executor:
+            futures = {
+                executor.submit(self._run_variant, stage_obj, index, params): params
+                for index, params in enumerate(stage_obj.variants)
+            }
+            for future in as_completed(futures):
+                name = variant_name(stage_obj.stage_name, futures[future])
+                result = future.result()
+                print(result.stdout, end="")
+                if result.returncode == 0:
+                    click.secho(f"|{name}| is successful.", fg="green")
+                else:
+                    click.secho(f"|{name}| failed.", fg="red")
+                    print(result.stderr, end="", file=sys.stderr)
+                    failed_variants.append(name)
+
+        if failed_variants:
+            click.secho(f"|{stage_obj.stage_name}| failed.", fg="red")
+            raise AtlasPipelineError(
+                f"Error: {len(failed_variants)} variants failed: {', '.join(failed_variants)}"
+            )
+        click.secho(f"|{stage_obj.stage_name}| is successful.", fg="green")
+        print("\n===\n")
+
     def _run_stage(self, stage_obj: AtlasStage) -> None:
         """Internal function runs the atlas stage.
 
@@ -64,39 +300,285 @@ class AtlasPipeline:
         stage_obj: AtlasStage
           AtlasStage Class object
         """
+        if stage_obj.variants:
+            self._run_matrix_stage(stage_obj)
+            return
+
         script_ = stage_obj.script
         try:
             print(f"Running script: {script_} in |{stage_obj.stage_name}| stage.")
             with open(script_) as module:
-                exec(module.read())
+                code = compile(module.read(), script_, "exec")
+            # Each run gets a fresh namespace so re-runs in a long-lived
+            # process (e.g. `atlas run --watch`) don't see stale globals.
+            exec(code, {"__name__": "__main__", "__file__": script_})
             click.secho(f"|{stage_obj.stage_name}| is successful.", fg="green")
             print("\n===\n")
         except BaseException as error_message:
             click.secho(f"|{stage_obj.stage_name}| failed.", fg="red")
             raise AtlasPipelineError(f"Error: {error_message}")
 
+    async def _call_entry(
+        self,
+        stage_obj: AtlasStage,
+        entry_callable: Callable[[], Any],
+        variant: Optional[tuple[int, dict[str, Any]]] = None,
+    ) -> None:
+        """Internal function that calls the entry of a stage, or of one of its variants,
+        on the event loop. Synchronous callables run in a worker thread.
+
+        Parameters
+        ----------
+        stage_obj: AtlasStage
+          AtlasStage Class object
+
+        entry_callable: Callable[[], Any]
+          Entry of the stage
+
+        variant: Optional[tuple[int, dict[str, Any]]] = None
+          Index and parameters of the variant to run
+        """
+        if variant is None:
+            result = (
+                entry_callable()
+                if inspect.iscoroutinefunction(entry_callable)
+                else await asyncio.to_thread(entry_callable)
+            )
+            if inspect.isawaitable(result):
+                await result
+            return
+
+        index, params = variant
+        name = variant_name(stage_obj.stage_name, params)
+        results_path = init_variant_results(stage_obj.stage_name, index, params)
+        # Each variant runs in its own task, so the context only reaches its own code,
+        # including the run its metrics and saved models are linked to.
+        with variant_context(params, results_path), variant_run(index):
+            try:
+                await self._call_entry(stage_obj, entry_callable)
+            except Exception:
+                click.secho(f"|{name}| failed.", fg="red")
+                traceback.print_exc()
+                raise
+        click.secho(f"|{name}| is successful.", fg="green")
+
+    async def _run_entry_variants(
+        self, stage_obj: AtlasStage, entry_callable: Callable[[], Any]
+    ) -> None:
+        """Internal function that runs all variants of an entry matrix stage
+        concurrently, at most `parallelism` at a time. Like script variants, every
+        variant runs to the end before the failed ones are reported.
+
+        Parameters
+        ----------
+        stage_obj: AtlasStage
+          AtlasStage Class object
+
+        entry_callable: Callable[[], Any]
+          Entry of the stage
+        """
+        reset_variant_results(stage_obj.stage_name)
+        variant_semaphore = asyncio.Semaphore(stage_obj.parallelism)
+
+        async def run_variant(variant):
+            async with variant_semaphore:
+                await self._call_entry(stage_obj, entry_callable, variant)
+
+        results = await asyncio.gather(
+            *(run_variant(variant) for variant in enumerate(stage_obj.variants)),
+            return_exceptions=True,
+        )
+        failed_variants = [
+            variant_name(stage_obj.stage_name, params)
+            for params, result in zip(stage_obj.variants, results)
+            if isinstance(result, BaseException)
+        ]
+        if failed_variants:
+            raise AtlasPipelineError(
+                f"{len(failed_variants)} variants failed: {', '.join(failed_variants)}"
+            )
+
+    async def _run_entry_stage(
+        self, stage_obj: AtlasStage, semaphore: asyncio.Semaphore
+    ) -> None:
+        """Internal function that runs a `module:function` stage on the event loop,
+        running its variants concurrently if it is a matrix stage.
+
+        Parameters
+        ----------
+        stage_obj: AtlasStage
+          AtlasStage Class object
+
+        semaphore: asyncio.Semaphore
+          Limit on the number of entry stages running at once
+        """
+        entry_callable = stage_obj.load_entry()
+        async with semaphore:
+            print(
+                f"Running entry: {stage_obj.entry} in |{stage_obj.stage_name}| stage."
+            )
+            with _observe_stage(stage_obj.stage_name):
+                try:
+                    if stage_obj.variants:
+                        await self._run_entry_variants(stage_obj, entry_callable)
+                    else:
+                        await self._call_entry(stage_obj, entry_callable)
+                except Exception as error_message:
+                    click.secho(f"|{stage_obj.stage_name}| failed.", fg="red")
+                    raise AtlasPipelineError(f"Error: {error_message}")
+            click.secho(f"|{stage_obj.stage_name}| is successful.", fg="green")
+
+    async def _run_stages_async(self, stage_names: list[str]) -> None:
+        """Internal function that runs the given stages on one event loop. Each stage
+        starts once all of its parents have finished. Entry stages overlap, up to the
+        pipeline concurrency. Script stages run one at a time on the loop's own (main)
+        thread, so they can still install signal handlers and receive Ctrl+C, and
+        asynchronous entry stages wait while one runs.
+
+        Parameters
+        ----------
+        stage_names: list[str]
+          Names of the stages to run, in topological order.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        parents: dict[str, list[str]] = {name: [] for name in stage_names}
+        for stage_name in stage_names:
+            for next_stage in self._children(stage_name):
+                if next_stage in parents:
+                    parents[next_stage].append(stage_name)
+
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage_name: str) -> None:
+            await asyncio.gather(*(tasks[parent] for parent in parents[stage_name]))
+            stage_obj = self.stages[stage_name]
+            if stage_obj.entry:
+                await self._run_entry_stage(stage_obj, semaphore)
+            else:
+                with _observe_stage(stage_name):
+                    self._run_stage(stage_obj)
+
+        for stage_name in stage_names:
+            tasks[stage_name] = asyncio.ensure_future(run_stage(stage_name))
+        await asyncio.gather(*tasks.values())
+
     def run_atlas(self):
         """Callable function that runs the atlas pipeline"""
-        current_stage = self.root_stage
+        self.run_stages(self.execution_order())
+
+    def execution_order(self) -> list[str]:
+        """Callable function that returns every stage reachable from the root stages in
+        the order they run.
 
-        if current_stage is None:
+        Returns
+        -------
+        : list[str]
+        """
+        if not self.root_stages:
             raise AtlasPipelineError("No root stage been set.")
 
-        stages_queue = deque([current_stage])
-        active_stage = set()
+        return self.downstream_stages([stage.stage_name for stage in self.root_stages])
+
+    def downstream_stages(self, stage_names: list[str]) -> list[str]:
+        """Callable function that returns the given stages and every stage downstream
+        of them, ordered so that each stage comes after all of its parents.
+
+        Parameters
+        ----------
+        stage_names: list[str]
+          Names of the stages to start from.
+
+        Returns
+        -------
+        : list[str]
+        """
+        for stage_name in stage_names:
+            if stage_name not in self.stages:
+                raise AtlasPipelineError(f"Stage '{stage_name}' does not exist.")
 
+        reachable = set(stage_names)
+        stages_queue = deque(stage_names)
         while stages_queue:
+            for next_stage in self._children(stages_queue.popleft()):
+                if next_stage not in reachable:
+                    reachable.add(next_stage)
+                    stages_queue.append(next_stage)
 
-            curr_stage = stages_queue.popleft()
+        return [name for name in self.topological_order if name in reachable]
 
-            self._run_stage(curr_stage)
-            next_stages = curr_stage.next_stages
+    def execution_levels(self, stage_names: list[str]) -> list[list[str]]:
+        """Callable function that groups stages into levels. Stages in the same level
+        have no dependencies on each other, and every parent of a stage is in an
+        earlier level.
+
+        Parameters
+        ----------
+        stage_names: list[str]
+          Names of the stages, in topological order.
+
+        Returns
+        -------
+        : list[list[str]]
+        """
+        stage_levels = dict.fromkeys(stage_names, 0)
+        execution_levels: list[list[str]] = []
+        for stage_name in stage_names:
+            level = stage_levels[stage_name]
+            if level == len(execution_levels):
+                execution_levels.append([])
+            execution_levels[level].append(stage_name)
+            for next_stage in self._children(stage_name):
+                if next_stage in stage_levels:
+                    stage_levels[next_stage] = max(stage_levels[next_stage], level + 1)
+        return execution_levels
 
-            if next_stages is None:
-                return
+    def critical_path(self, stage_names: list[str]) -> list[str]:
+        """Callable function that returns the longest chain of dependent stages.
+
+        Parameters
+        ----------
+        stage_names: list[str]
+          Names of the stages, in topological order.
+
+        Returns
+        -------
+        : list[str]
+        """
+        if not stage_names:
+            return []
+
+        path_lengths = dict.fromkeys(stage_names, 1)
+        previous_stage: dict[str, str] = {}
+        for stage_name in stage_names:
+            for next_stage in self._children(stage_name):
+                if next_stage not in path_lengths:
+                    continue
+                if path_lengths[stage_name] + 1 > path_lengths[next_stage]:
+                    path_lengths[next_stage] = path_lengths[stage_name] + 1
+                    previous_stage[next_stage] = stage_name
+
+        last_stage = max(stage_names, key=path_lengths.__getitem__)
+        path = [last_stage]
+        while path[-1] in previous_stage:
+            path.append(previous_stage[path[-1]])
+        return path[::-1]
+
+    def run_stages(self, stage_names: list[str]) -> None:
+        """Callable function that runs the given stages in order.
+
+        Parameters
+        ----------
+        stage_names: list[str]
+          Names of the stages to run.
+
+        Every call is a new run, with metrics logged by its stages kept apart from
+        those of earlier runs in the same process.
+        """
+        start_run()
+        if any(self.stages[stage_name].entry for stage_name in stage_names):
+            asyncio.run(self._run_stages_async(stage_names))
+            return
 
-            for next_stage in next_stages:
-                if next_stage not in active_stage:
-                    stage_object = self.stages[next_stage]
-                    active_stage.add(stage_object)
-                    stages_queue.append(stage_object)
+        for stage_name in stage_names:
+            with _observe_stage(stage_name):
+                self._run_stage(self.stages[stage_name])
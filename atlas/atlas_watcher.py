@@ -0,0 +1,181 @@
+import importlib
+import os
+import sys
+import time
+from typing import Optional
+
+import click
+
+from atlas.atlas_pipeline import AtlasPipeline, AtlasPipelineError
+from atlas.telemetry import REGISTRY
+
+# (latest mtime in ns, number of files, total size in bytes) of a watched path.
+PathSignature = Optional[tuple[int, int, int]]
+
+
+def path_signature(path: str) -> PathSignature:
+    """Compute a cheap change signature for a file or directory using only stat calls.
+
+    Parameters
+    ----------
+    path: str
+        Path to a file or directory.
+
+    Returns
+    -------
+    : PathSignature
+        None if the path does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    if not os.path.isdir(path):
+        return (stat.st_mtime_ns, 1, stat.st_size)
+
+    latest_mtime, num_files, total_size = stat.st_mtime_ns, 0, 0
+    dirs = [path]
+    while dirs:
+        try:
+            with os.scandir(dirs.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                        continue
+                    entry_stat = entry.stat()
+                    latest_mtime = max(latest_mtime, entry_stat.st_mtime_ns)
+                    num_files += 1
+                    total_size += entry_stat.st_size
+        except OSError:
+            continue
+    return (latest_mtime, num_files, total_size)
+
+
+class AtlasWatcher:  # pylint: disable=too-many-instance-attributes
+    """Atlas Watcher Class object.
+
+    Polls the scripts and declared inputs of a set of stages and re-runs the changed
+    stages, together with the stages downstream of them, in a long-lived process.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        pipeline: AtlasPipeline,
+        stage_names: list[str],
+        interval: float = 0.25,
+        debounce: float = 0.5,
+        textfile_path: Optional[str] = None,
+    ):
+        self.pipeline = pipeline
+        self.stage_names = stage_names
+        self.interval = interval
+        self.debounce = debounce
+        self.textfile_path = textfile_path
+        self.watched_paths: dict[str, set[str]] = {}
+        self.input_paths: set[str] = set()
+        for stage_name in stage_names:
+            stage_obj = pipeline.stages[stage_name]
+            for path in [stage_obj.source_path, *stage_obj.inputs]:
+                if path is None:
+                    continue
+                path = os.path.abspath(path)
+                self.watched_paths.setdefault(path, set()).add(stage_name)
+            self.input_paths.update(os.path.abspath(path) for path in stage_obj.inputs)
+        self.signatures = {path: path_signature(path) for path in self.watched_paths}
+
+    def poll(self) -> set[str]:
+        """Callable function that returns the stages whose watched paths changed since
+        the last poll.
+
+        Returns
+        -------
+        : set[str]
+        """
+        changed_stages = set()
+        for path, stage_names in self.watched_paths.items():
+            signature = path_signature(path)
+            if signature != self.signatures[path]:
+                self.signatures[path] = signature
+                changed_stages.update(stage_names)
+        return changed_stages
+
+    def wait_for_changes(self) -> set[str]:
+        """Callable function that blocks until a burst of changes has settled for
+        `debounce` seconds and returns every stage changed during the burst.
+
+        Returns
+        -------
+        : set[str]
+        """
+        pending_stages: set[str] = set()
+        last_change = 0.0
+        while True:
+            changed_stages = self.poll()
+            now = time.monotonic()
+            if changed_stages:
+                pending_stages |= changed_stages
+                last_change = now
+            elif pending_stages and now - last_change >= self.debounce:
+                return pending_stages
+            time.sleep(self.interval)
+
+    def reload_entry_modules(self, stage_names: list[str]) -> None:
+        """Callable function that reloads the already imported modules of entry stages,
+        so re-runs pick up their edits. Script stages are re-read on every run.
+
+        Parameters
+        ----------
+        stage_names: list[str]
+            Names of the stages about to run.
+        """
+        for stage_name in stage_names:
+            module_name = self.pipeline.stages[stage_name].entry_module
+            if module_name in sys.modules:
+                try:
+                    importlib.reload(sys.modules[module_name])
+                except Exception as error_message:
+                    raise AtlasPipelineError(
+                        f"Error reloading {module_name}: {error_message}"
+                    )
+
+    def run(self, stage_names: list[str]) -> None:
+        """Callable function that runs the given stages and everything downstream of
+        them, reporting failures without stopping the watcher. The metrics text file,
+        if any, is rewritten after every run.
+
+        Parameters
+        ----------
+        stage_names: list[str]
+            Names of the stages to run.
+        """
+        try:
+            stage_names = self.pipeline.downstream_stages(stage_names)
+            self.reload_entry_modules(stage_names)
+            self.pipeline.run_stages(stage_names)
+            click.secho("Watch run: Successful.", fg="green")
+        except AtlasPipelineError as error_message:
+            click.secho(f"Watch run failed. {error_message}", fg="red")
+        finally:
+            # Inputs written by the stages themselves (e.g. a preprocessing stage
+            # writing the data of a training stage) don't trigger another run. Scripts
+            # keep their signatures, so edits saved during the run are still picked up.
+            for path in self.input_paths:
+                self.signatures[path] = path_signature(path)
+            if self.textfile_path:
+                REGISTRY.write_textfile(self.textfile_path)
+
+    def watch(self) -> None:
+        """Callable function that runs the watched stages once and then re-runs them
+        on every change until interrupted."""
+        self.run(self.stage_names)
+        click.secho(
+            f"Watching {len(self.watched_paths)} paths for changes. Press Ctrl+C to stop.",
+            fg="yellow",
+        )
+        while True:
+            changed_stages = self.wait_for_changes()
+            # Keep pipeline order so the output is stable across runs.
+            changed = [name for name in self.stage_names if name in changed_stages]
+            click.secho(f"Detected changes in: {', '.join(changed)}", fg="yellow")
+            self.run(changed)
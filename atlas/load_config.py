@@ -1,29 +1,53 @@
-from typing import Optional, TypedDict
+from typing import Optional, TypedDict, Union
 
 import yaml
 from yaml.parser import ParserError
 
+from atlas.storage import AtlasStorageError, parse_size
+
 ATLAS_CONFIG_FILE = "atlas-config.yaml"
 
 
 class AtlasStageInfo(TypedDict):
     """Format for stage information in config file"""
 
-    script: str
+    script: Optional[str]
+    entry: Optional[str]
     root: Optional[bool]
     next_stages: list[str]
+    inputs: Optional[list[str]]
+    matrix: Optional[dict[str, list]]
+    parallelism: Optional[int]
 
 
 class AtlasPipelineInfo(TypedDict):
     """Format for pipeline information in config file"""
 
     stages: dict[str, AtlasStageInfo]
+    concurrency: Optional[int]
+
+
+class AtlasStorageInfo(TypedDict):
+    """Format for model storage information in config file"""
+
+    remote: Optional[str]
+    cache_size: Optional[Union[int, str]]
+
+
+class AtlasTelemetryInfo(TypedDict):
+    """Format for metrics export information in config file"""
+
+    enabled: Optional[bool]
+    port: Optional[int]
+    textfile: Optional[str]
 
 
 class AtlasConfigInfo(TypedDict):
     """Format for config file"""
 
     pipeline: AtlasPipelineInfo
+    storage: Optional[AtlasStorageInfo]
+    telemetry: Optional[AtlasTelemetryInfo]
 
 
 class ConfigValidationError(Exception):
@@ -47,12 +71,47 @@ def validate_config_file(config_info: AtlasConfigInfo) -> None:
     if "stages" not in config_info["pipeline"]:
         raise ConfigValidationError("Failed to find 'stages' key in pipeline")
 
+    concurrency = config_info["pipeline"].get("concurrency", 1)
+    if not isinstance(concurrency, int) or concurrency < 1:
+        raise ConfigValidationError(
+            "'concurrency' key in pipeline must be a positive integer"
+        )
+
     stages = config_info["pipeline"]["stages"]
     contains_root = False
     for stage, stage_info in stages.items():
-        if "script" not in stage_info.keys():
+        if "script" not in stage_info.keys() and "entry" not in stage_info.keys():
+            raise ConfigValidationError(
+                f"Failed to find 'script' or 'entry' key in '{stage}' stage"
+            )
+
+        if "script" in stage_info.keys() and "entry" in stage_info.keys():
+            raise ConfigValidationError(
+                f"Only one of 'script' and 'entry' keys can be set in '{stage}' stage"
+            )
+
+        if "entry" in stage_info.keys() and ":" not in str(stage_info["entry"]):
+            raise ConfigValidationError(
+                f"'entry' key in '{stage}' stage must have the form 'module:function'"
+            )
+
+        if not isinstance(stage_info.get("inputs", []), list):
+            raise ConfigValidationError(
+                f"'inputs' key in '{stage}' stage must be a list of paths"
+            )
+
+        matrix = stage_info.get("matrix", {})
+        if not isinstance(matrix, dict) or not all(
+            isinstance(values, list) and values for values in matrix.values()
+        ):
             raise ConfigValidationError(
-                f"Failed to find 'script' key in '{stage}' stage"
+                f"'matrix' key in '{stage}' stage must map parameter names to non-empty lists"
+            )
+
+        parallelism = stage_info.get("parallelism", 1)
+        if not isinstance(parallelism, int) or parallelism < 1:
+            raise ConfigValidationError(
+                f"'parallelism' key in '{stage}' stage must be a positive integer"
             )
 
         if not contains_root and stage_info.get("root"):
@@ -61,6 +120,35 @@ def validate_config_file(config_info: AtlasConfigInfo) -> None:
     if not contains_root:
         raise ConfigValidationError("Failed to find any root stage in config file")
 
+    storage = config_info.get("storage", {})
+    if not isinstance(storage, dict):
+        raise ConfigValidationError("'storage' key in config file must be a mapping")
+
+    if "remote" in storage and not isinstance(storage["remote"], str):
+        raise ConfigValidationError("'remote' key in storage must be a directory path")
+
+    if "cache_size" in storage:
+        try:
+            parse_size(storage["cache_size"])
+        except AtlasStorageError as err:
+            raise ConfigValidationError(f"Invalid 'cache_size' key in storage: {err}")
+
+    telemetry = config_info.get("telemetry", {})
+    if not isinstance(telemetry, dict):
+        raise ConfigValidationError("'telemetry' key in config file must be a mapping")
+
+    if "enabled" in telemetry and not isinstance(telemetry["enabled"], bool):
+        raise ConfigValidationError("'enabled' key in telemetry must be true or false")
+
+    port = telemetry.get("port", 1)
+    if not isinstance(port, int) or not 0 < port < 65536:
+        raise ConfigValidationError(
+            "'port' key in telemetry must be a valid port number"
+        )
+
+    if "textfile" in telemetry and not isinstance(telemetry["textfile"], str):
+        raise ConfigValidationError("'textfile' key in telemetry must be a file path")
+
 
 def load_config_file() -> AtlasConfigInfo:
     """Function for loading in atlas config file.
@@ -0,0 +1,200 @@
+import contextlib
+import contextvars
+import itertools
+import json
+import os
+import shutil
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from atlas.utils.atlas_config import ATLAS_HIDDEN_DIRECTORY
+from atlas.utils.system_utils import get_root_dir
+
+root_dir = get_root_dir()
+atlas_folder_path = os.path.join(root_dir, ATLAS_HIDDEN_DIRECTORY)
+stage_outputs_path = os.path.join(atlas_folder_path, "components_ouputs")
+
+STAGE_PARAMS_ENV = "ATLAS_STAGE_PARAMS"
+VARIANT_RESULTS_ENV = "ATLAS_VARIANT_RESULTS"
+
+# Parameters and results path of a variant running in-process, such as a variant of an
+# `entry` stage. Variants running in their own interpreter use the environment instead.
+_variant_context: contextvars.ContextVar[Optional[Tuple[Dict[str, Any], str]]] = (
+    contextvars.ContextVar("atlas_variant_context", default=None)
+)
+
+
+class AtlasMatrixError(Exception):
+    """Error when calling atlas matrix functions"""
+
+
+def expand_matrix(matrix: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Expands a matrix block into the parameters of every variant.
+
+    Parameters
+    ----------
+    matrix: Dict[str, List[Any]]
+        Parameter names mapped to the values to sweep over
+
+    Returns
+    -------
+    variants: List[Dict[str, Any]]
+        One parameter dictionary per combination of values
+    """
+    names = list(matrix)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(matrix[name] for name in names))
+    ]
+
+
+def variant_name(stage_name: str, params: Dict[str, Any]) -> str:
+    """Generates a readable name for a stage variant, e.g. `train[lr=0.1,depth=2]`.
+
+    Parameters
+    ----------
+    stage_name: str
+        Name of the matrix stage
+
+    params: Dict[str, Any]
+        Parameters of the variant
+
+    Returns
+    -------
+    name: str
+        Variant name
+    """
+    params_str = ",".join(f"{name}={value}" for name, value in params.items())
+    return f"{stage_name}[{params_str}]"
+
+
+def get_variant_results_path(stage_name: str) -> str:
+    """Path of the directory holding the variant results of a matrix stage."""
+    return os.path.join(stage_outputs_path, stage_name)
+
+
+def reset_variant_results(stage_name: str) -> None:
+    """Removes the variant results of a previous run of a matrix stage."""
+    results_path = get_variant_results_path(stage_name)
+    shutil.rmtree(results_path, ignore_errors=True)
+    os.makedirs(results_path)
+
+
+def init_variant_results(stage_name: str, index: int, params: Dict[str, Any]) -> str:
+    """Creates the results file of a stage variant and returns its path.
+
+    Parameters
+    ----------
+    stage_name: str
+        Name of the matrix stage
+
+    index: int
+        Index of the variant
+
+    params: Dict[str, Any]
+        Parameters of the variant
+
+    Returns
+    -------
+    results_path: str
+        Path of the variant results file
+    """
+    results_path = os.path.join(
+        get_variant_results_path(stage_name), f"{index:05d}.json"
+    )
+    with open(results_path, "w") as file:
+        json.dump(
+            {
+                "variant": variant_name(stage_name, params),
+                "params": params,
+                "models": [],
+            },
+            file,
+        )
+    return results_path
+
+
+@contextlib.contextmanager
+def variant_context(params: Dict[str, Any], results_path: str) -> Iterator[None]:
+    """Context manager that exposes the parameters and results path of a variant to
+    code running in the current context (thread or asyncio task).
+
+    Parameters
+    ----------
+    params: Dict[str, Any]
+        Parameters of the variant
+
+    results_path: str
+        Path of the variant results file
+    """
+    token = _variant_context.set((params, results_path))
+    try:
+        yield
+    finally:
+        _variant_context.reset(token)
+
+
+def get_stage_params() -> Dict[str, Any]:
+    """Callable function that returns the parameters of the running stage variant.
+
+    Returns
+    -------
+    params: Dict[str, Any]
+        Variant parameters, empty if the stage isn't a matrix variant
+    """
+    context = _variant_context.get()
+    if context is not None:
+        return context[0]
+
+    params = os.environ.get(STAGE_PARAMS_ENV)
+    if not params:
+        return {}
+    return json.loads(params)
+
+
+def record_variant_model(model_name: str, version: str) -> None:
+    """Records a saved model in the results of the running stage variant, if any.
+
+    Parameters
+    ----------
+    model_name: str
+        Name of model
+
+    version: str
+        Saved model version
+    """
+    context = _variant_context.get()
+    results_path = context[1] if context else os.environ.get(VARIANT_RESULTS_ENV)
+    if not results_path:
+        return
+
+    with open(results_path, "r") as file:
+        results = json.load(file)
+    results["models"].append({"model_name": model_name, "version": version})
+    with open(results_path, "w") as file:
+        json.dump(results, file)
+
+
+def get_variant_results(stage_name: str) -> List[Dict[str, Any]]:
+    """Callable function that returns the results of every variant of a matrix stage,
+    for use in a downstream stage that reduces over them.
+
+    Parameters
+    ----------
+    stage_name: str
+        Name of the matrix stage
+
+    Returns
+    -------
+    results: List[Dict[str, Any]]
+        One dictionary per variant with its `variant` name, `params` and the
+        `models` (name and version) it saved
+    """
+    results_path = get_variant_results_path(stage_name)
+    if not os.path.isdir(results_path):
+        raise AtlasMatrixError(f"Failed to find variant results of {stage_name} stage")
+
+    results = []
+    for file_name in sorted(os.listdir(results_path)):
+        with open(os.path.join(results_path, file_name), "r") as file:
+            results.append(json.load(file))
+    return results
@@ -1,11 +1,18 @@
 import json
 import os
-import shutil
-from typing import Any, Dict, Literal, Optional
+from concurrent.futures import Future
+from datetime import datetime
+from functools import cached_property
+from typing import Any, Dict, List, Literal, Optional
 
 import cloudpickle
 from packaging.version import Version
 
+from atlas.load_config import ConfigValidationError, load_config_file
+from atlas.matrix import get_stage_params, record_variant_model
+from atlas.storage import StorageBackend, build_storage
+from atlas.telemetry import REGISTRY
+from atlas.tracking import get_active_run_id
 from atlas.utils.atlas_config import ATLAS_HIDDEN_DIRECTORY
 from atlas.utils.system_utils import get_root_dir
 
@@ -17,11 +24,108 @@ model_repository_path = os.path.join(atlas_folder_path, "model_repository")
 
 VERSION = Literal["major", "minor", "patch"]
 
+SAVE_SECONDS = REGISTRY.histogram(
+    "atlas_model_save_seconds", "Time spent saving a model version."
+)
+LOAD_SECONDS = REGISTRY.histogram(
+    "atlas_model_load_seconds", "Time spent loading a model version."
+)
+BYTES_WRITTEN = REGISTRY.counter(
+    "atlas_model_bytes_written_total", "Bytes written to the model repository."
+)
+BYTES_READ = REGISTRY.counter(
+    "atlas_model_bytes_read_total", "Bytes of model.pkl read from the model repository."
+)
+
 
 class AtlasModelError(Exception):
     """Error when calling atlas model functions"""
 
 
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    """Callable function that returns the storage backend of the atlas model repository.
+    It is built on first use from the `storage` section of atlas-config.yaml, and is
+    the local model repository when there is no config file or no remote tier is
+    configured.
+
+    Returns
+    -------
+    storage: StorageBackend
+        Storage backend
+    """
+    global _storage  # pylint: disable=global-statement
+    if _storage is None:
+        try:
+            storage_info = load_config_file().get("storage")
+        except FileNotFoundError:
+            storage_info = None
+        except ConfigValidationError as err:
+            raise AtlasModelError(f"Invalid atlas-config.yaml: {str(err)}") from err
+        _storage = build_storage(model_repository_path, storage_info)
+    return _storage
+
+
+def set_storage(storage: StorageBackend) -> None:
+    """Callable function that replaces the storage backend of the atlas model repository.
+
+    Parameters
+    ----------
+    storage: StorageBackend
+        Storage backend
+    """
+    global _storage  # pylint: disable=global-statement
+    _storage = storage
+
+
+def get_model_versions(model_name: str) -> List[str]:
+    """Callable function that returns the versions of a model, oldest first.
+
+    Parameters
+    ----------
+    model_name: str
+        Name of model
+
+    Returns
+    -------
+    model_versions: List[str]
+        Model versions
+    """
+    model_versions = get_storage().list_versions(model_name)
+    if not model_versions:
+        raise AtlasModelError(f"Failed to find {model_name} in atlas model repository")
+    model_versions.sort(key=Version)
+    return model_versions
+
+
+def resolve_version(model_name: str, version: Optional[str] = None) -> str:
+    """Callable function that checks a model version exists, resolving `latest`.
+
+    Parameters
+    ----------
+    model_name: str
+        Name of model
+
+    version: Optional[str] = None
+        Model version. If None or `latest`, the latest version is returned
+
+    Returns
+    -------
+    version: str
+        Model version
+    """
+    model_versions = get_model_versions(model_name)
+    if not version or version == "latest":
+        return model_versions[-1]
+    if version not in model_versions:
+        raise AtlasModelError(
+            f"Failed to find {model_name} {version} in atlas model repository"
+        )
+    return version
+
+
 def generate_new_version(last_version: str, update_type: VERSION) -> str:
     """Generates a new version tag based on the previous version and type of update.
 
@@ -47,12 +151,13 @@ def generate_new_version(last_version: str, update_type: VERSION) -> str:
     return f"{major}.{minor}.{int(patch)+1}"
 
 
-def save_model(
+def save_model(  # pylint: disable=too-many-arguments
     model: Any,
     model_name: str,
     parameters: Optional[Dict[str, Any]] = None,
     metrics: Optional[Dict[str, Any]] = None,
     update_type: Optional[VERSION] = "patch",
+    gems: Optional[Dict[str, Any]] = None,
 ) -> None:
     """Callable function that saves a model and revelant info of it in the atlas model repository.
 
@@ -72,58 +177,83 @@ def save_model(
 
     update_type: VERSION
         Type of update for new version (major, minor or patch)
+
+    gems: Optional[Dict[str, Any]] = None
+        Any other info worth keeping with the model, such as feature names or the
+        dataset it was trained on, stored in a dictionary
+
+    When called from a variant of a matrix stage, the variant parameters are added to
+    `parameters` and the new version is recorded in the variant results.
     """
-    if not os.path.isdir(model_repository_path):
-        try:
-            os.mkdir(model_repository_path)
-        except OSError as err:
-            raise AtlasModelError(
-                f"Error raised while creating model repository: {err.errno}"
-            )
+    stage_params = get_stage_params()
+    if stage_params:
+        parameters = {**stage_params, **(parameters or {})}
+
+    with SAVE_SECONDS.time():
+        new_version = _save_model_files(
+            model,
+            model_name,
+            {"parameters": parameters, "metrics": metrics, "gems": gems},
+            update_type,
+        )
+
+    record_variant_model(model_name, new_version)
+    print(f"{model_name} {new_version} successfully stored in atlas model repository")
+
+
+def _save_model_files(
+    model: Any,
+    model_name: str,
+    model_infos: Dict[str, Optional[Dict[str, Any]]],
+    update_type: Optional[VERSION],
+) -> str:
+    """Writes the files of a new model version and returns the version."""
+    storage = get_storage()
+
+    # Concurrent saves (e.g. variants of a matrix stage) can pick the same version,
+    # so the version is claimed atomically and re-picked on collision.
+    while True:
+        model_versions = storage.list_versions(model_name)
+        model_versions.sort(key=Version)
+        last_version = model_versions[-1] if model_versions else "0.0.0"
+        new_version = generate_new_version(last_version, update_type)
 
-    model_path = os.path.join(model_repository_path, model_name)
-    last_version = "0.0.0"
-    if not os.path.isdir(model_path):
         try:
-            os.mkdir(model_path)
+            if storage.create_version(model_name, new_version):
+                break
         except OSError as err:
             raise AtlasModelError(
-                f"Error raised while creating model path: {err.errno}"
+                f"Error raised while creating new version path: {err.errno}"
             )
-    else:
-        model_versions = os.listdir(model_path)
-        if model_versions:
-            model_versions.sort(key=Version)
-            last_version = model_versions[-1]
-
-    new_version = generate_new_version(last_version, update_type)
-    new_version_path = os.path.join(model_path, new_version)
-
-    try:
-        os.mkdir(new_version_path)
-    except OSError as err:
-        raise AtlasModelError(
-            f"Error raised while creating new version path: {err.errno}"
-        )
 
-    new_version_model_path = os.path.join(new_version_path, "model.pkl")
-    with open(new_version_model_path, "wb") as file:
+    with storage.open_file(model_name, new_version, "model.pkl", "wb") as file:
         cloudpickle.dump(model, file)
 
-    model_infos = {"parameters": parameters, "metrics": metrics}
+    # Links the version to the metrics logged with atlas.log_metric in this run.
+    run_id = get_active_run_id()
+    run_info = {"run_id": run_id} if run_id else None
+
+    model_infos = {**model_infos, "run": run_info}
     for model_info, info_dict in model_infos.items():
         if not info_dict:
             continue
 
-        full_json_path = os.path.join(new_version_path, model_info + ".json")
-
         try:
-            with open(full_json_path, "w") as file:
+            with storage.open_file(
+                model_name, new_version, model_info + ".json", "w"
+            ) as file:
                 json.dump(info_dict, file)
         except json.JSONDecodeError as err:
             raise AtlasModelError(f"Failed to save model {model_info}: {str(err)}")
 
-    print(f"{model_name} {new_version} successfully stored in atlas model repository")
+    if REGISTRY.enabled:
+        BYTES_WRITTEN.inc(
+            sum(
+                storage.file_size(model_name, new_version, file_name)
+                for file_name in storage.list_files(model_name, new_version)
+            )
+        )
+    return new_version
 
 
 def load_model(model_name: str, version: Optional[str] = None) -> Any:
@@ -142,26 +272,159 @@ def load_model(model_name: str, version: Optional[str] = None) -> Any:
     model: Any
         Model object saved in the repository
     """
-    model_path = os.path.join(model_repository_path, model_name)
-    if not os.path.isdir(model_path):
-        raise AtlasModelError(f"Failed to find {model_name} in atlas model repository")
+    return get_model(model_name, version).load()
 
-    if not version or version == "latest":
-        model_versions = os.listdir(model_path)
-        if model_versions:
-            model_versions.sort(key=Version)
-            version = model_versions[-1]
 
-    model_version_path = os.path.join(model_path, version, "model.pkl")
-    if not os.path.exists(model_version_path):
-        raise AtlasModelError(
-            f"Failed to find {model_name} {version} in atlas model repository"
+class ModelVersion:
+    """Model Version Class object.
+
+    Handle on a stored model version. Its info is read from the model repository on
+    first access and cached, and the model itself is only unpickled by `load`.
+    """
+
+    def __init__(self, model_name: str, version: str):
+        self.model_name = model_name
+        self.version = version
+
+    def __repr__(self) -> str:
+        return f"ModelVersion(model_name={self.model_name!r}, version={self.version!r})"
+
+    def _read_info(self, model_info: str) -> Dict[str, Any]:
+        """Internal function that reads a json info file of the version, or returns an
+        empty dictionary if it wasn't saved."""
+        info_file = model_info + ".json"
+        if info_file not in self.files:
+            return {}
+        with get_storage().open_file(
+            self.model_name, self.version, info_file, "r"
+        ) as file:
+            return json.load(file)
+
+    @cached_property
+    def files(self) -> List[str]:
+        """Names of the files stored for the version."""
+        return get_storage().list_files(self.model_name, self.version)
+
+    @cached_property
+    def parameters(self) -> Dict[str, Any]:
+        """Model parameters, empty if none were saved."""
+        return self._read_info("parameters")
+
+    @cached_property
+    def metrics(self) -> Dict[str, Any]:
+        """Model metrics, empty if none were saved."""
+        return self._read_info("metrics")
+
+    @cached_property
+    def gems(self) -> Dict[str, Any]:
+        """Other model info, empty if none was saved."""
+        return self._read_info("gems")
+
+    @cached_property
+    def run_id(self) -> Optional[str]:
+        """Id of the run that saved the version, None if no metrics were logged."""
+        return self._read_info("run").get("run_id")
+
+    @cached_property
+    def size_bytes(self) -> int:
+        """Total size of the files stored for the version."""
+        storage = get_storage()
+        return sum(
+            storage.file_size(self.model_name, self.version, file_name)
+            for file_name in self.files
+        )
+
+    @cached_property
+    def created_at(self) -> datetime:
+        """Time the model was saved."""
+        return datetime.fromtimestamp(
+            get_storage().file_mtime(self.model_name, self.version, "model.pkl")
         )
 
-    with open(model_version_path, "rb") as file:
-        model = cloudpickle.load(file)
+    def load(self) -> Any:
+        """Callable function that unpickles the model.
+
+        Returns
+        -------
+        model: Any
+            Model object saved in the repository
+        """
+        storage = get_storage()
+        if "model.pkl" not in self.files:
+            raise AtlasModelError(
+                f"Failed to find {self.model_name} {self.version} in atlas model repository"
+            )
 
-    return model
+        with LOAD_SECONDS.time():
+            with storage.open_file(
+                self.model_name, self.version, "model.pkl", "rb"
+            ) as file:
+                model = cloudpickle.load(file)
+
+        if REGISTRY.enabled:
+            BYTES_READ.inc(
+                storage.file_size(self.model_name, self.version, "model.pkl")
+            )
+        return model
+
+
+def get_model(model_name: str, version: Optional[str] = None) -> ModelVersion:
+    """Callable function that returns a handle on a model version in the atlas model
+    repository, to inspect its info without loading the model.
+
+    Parameters
+    ----------
+    model_name: str
+        Name of model
+
+    version: Optional[str] = None
+        Model version. If None, the latest version is returned
+
+    Returns
+    -------
+    model_version: ModelVersion
+        Handle on the model version
+    """
+    return ModelVersion(model_name, resolve_version(model_name, version))
+
+
+def get_models(model_name: str) -> List[ModelVersion]:
+    """Callable function that returns a handle on every version of a model, oldest
+    first, listing the model repository only once.
+
+    Parameters
+    ----------
+    model_name: str
+        Name of model
+
+    Returns
+    -------
+    model_versions: List[ModelVersion]
+        Handles on the model versions
+    """
+    return [
+        ModelVersion(model_name, version) for version in get_model_versions(model_name)
+    ]
+
+
+def get_model_run_id(model_name: str, version: str) -> Optional[str]:
+    """Callable function that returns the id of the run that saved a model version,
+    for reading its logged metrics with `atlas.tracking.read_metrics`.
+
+    Parameters
+    ----------
+    model_name: str
+        Name of model
+
+    version: str
+        Model version
+
+    Returns
+    -------
+    run_id: Optional[str]
+        Run id, or None if no metrics were logged in the run
+    """
+    return get_model(model_name, version).run_id
 
 
 def delete_model(model_name: str, version: Optional[str] = None) -> None:
@@ -176,20 +439,43 @@ def delete_model(model_name: str, version: Optional[str] = None) -> None:
     version: Optional[str] = None
         Model version. If None, all versions of the model will be deleted
     """
-    model_path = os.path.join(model_repository_path, model_name)
-    if not os.path.isdir(model_path):
+    storage = get_storage()
+    if not storage.has_model(model_name):
         raise AtlasModelError(f"Failed to find {model_name} in atlas model repository")
 
     if not version:
-        shutil.rmtree(model_path)
+        storage.delete(model_name)
         print(f"Successfully deleted {model_name} from atlas model respository")
     else:
-        model_version_path = os.path.join(model_path, version)
-        if not os.path.exists(model_version_path):
+        if not storage.has_version(model_name, version):
             raise AtlasModelError(
                 f"Failed to find {model_name} {version} in atlas model repository"
             )
-        shutil.rmtree(model_version_path)
+        storage.delete(model_name, version)
         print(
             f"Successfully deleted {model_name} {version} from atlas model respository"
         )
+
+
+def prefetch(model_name: str, versions: Optional[List[str]] = None) -> List[Future]:
+    """Callable function that starts pulling model versions into the local tier of the
+    atlas model repository in the background, so later loads don't wait on the remote
+    tier. Nothing needs to be done when no remote tier is configured.
+
+    Parameters
+    ----------
+    model_name: str
+        Name of model
+
+    versions: Optional[List[str]] = None
+        Model versions. If None, the latest version is prefetched
+
+    Returns
+    -------
+    futures: List[Future]
+        Futures that complete once the files are in the local tier
+    """
+    resolved_versions = [
+        resolve_version(model_name, version) for version in versions or ["latest"]
+    ]
+    return get_storage().prefetch(model_name, resolved_versions)
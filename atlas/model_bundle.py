@@ -0,0 +1,322 @@
+import hashlib
+import io
+import json
+import struct
+import zlib
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from packaging.version import InvalidVersion, Version
+
+from atlas.model import (
+    AtlasModelError,
+    get_model_versions,
+    get_storage,
+    resolve_version,
+)
+
+BUNDLE_MAGIC = b"ATLASBDL"
+BUNDLE_FORMAT = 1
+CHUNK_SIZE = 1024 * 1024
+
+# Magic bytes followed by the length of the JSON index that precedes the file data.
+_HEADER = struct.Struct(f"<{len(BUNDLE_MAGIC)}sQ")
+
+
+def _read_chunks(model_name: str, version: str, file_name: str, compress: bool):
+    """Yields the raw and stored (possibly compressed) chunks of a model file."""
+    compressor = zlib.compressobj() if compress else None
+    with get_storage().open_file(model_name, version, file_name, "rb") as file:
+        while True:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk, compressor.compress(chunk) if compressor else chunk
+    if compressor:
+        yield b"", compressor.flush()
+
+
+def export_bundle(
+    model_name: str,
+    output: BinaryIO,
+    versions: Optional[List[str]] = None,
+    compress: bool = False,
+) -> Dict[str, Any]:
+    """Callable function that streams model versions into a single bundle.
+
+    The bundle starts with an index of every file's offset, length and checksum, so the
+    files are read once to build the index and once more to stream them, and nothing is
+    staged on disk. This allows writing to pipes as well as regular files.
+
+    Parameters
+    ----------
+    model_name: str
+        Name of model
+
+    output: BinaryIO
+        Writable binary stream for the bundle
+
+    versions: Optional[List[str]] = None
+        Model versions to export. If None, all versions are exported
+
+    compress: bool = False
+        Whether to compress every file with zlib
+
+    Returns
+    -------
+    index: Dict[str, Any]
+        Index written at the front of the bundle
+    """
+    index: Dict[str, Any] = {
+        "format": BUNDLE_FORMAT,
+        "compression": "zlib" if compress else None,
+        "versions": [],
+    }
+    if versions:
+        versions = [resolve_version(model_name, version) for version in versions]
+    else:
+        versions = get_model_versions(model_name)
+
+    offset = 0
+    for version in versions:
+        files = []
+        for file_name in sorted(get_storage().list_files(model_name, version)):
+            checksum, size, length = hashlib.sha256(), 0, 0
+            for chunk, stored_chunk in _read_chunks(
+                model_name, version, file_name, compress
+            ):
+                checksum.update(chunk)
+                size += len(chunk)
+                length += len(stored_chunk)
+            files.append(
+                {
+                    "name": file_name,
+                    "offset": offset,
+                    "length": length,
+                    "size": size,
+                    "sha256": checksum.hexdigest(),
+                }
+            )
+            offset += length
+        index["versions"].append(
+            {"model_name": model_name, "version": version, "files": files}
+        )
+
+    index_bytes = json.dumps(index).encode("utf-8")
+    output.write(_HEADER.pack(BUNDLE_MAGIC, len(index_bytes)))
+    output.write(index_bytes)
+
+    for version_info in index["versions"]:
+        for file_info in version_info["files"]:
+            checksum = hashlib.sha256()
+            for chunk, stored_chunk in _read_chunks(
+                model_name, version_info["version"], file_info["name"], compress
+            ):
+                checksum.update(chunk)
+                output.write(stored_chunk)
+            if checksum.hexdigest() != file_info["sha256"]:
+                raise AtlasModelError(
+                    f"{model_name} {version_info['version']} {file_info['name']} "
+                    "changed during export"
+                )
+
+    return index
+
+
+def _check_path_name(kind: str, name: Any) -> None:
+    """Rejects a name from a bundle index that is unsafe to use as a path component."""
+    if (
+        not isinstance(name, str)
+        or not name
+        or name.startswith(".")
+        or any(part in name for part in ("/", "\\", ".."))
+    ):
+        raise AtlasModelError(f"Failed to read bundle: invalid {kind} {name!r}")
+
+
+def _check_index(index: Dict[str, Any]) -> None:
+    """Checks the names and versions in a bundle index before anything is written."""
+    for version_info in index["versions"]:
+        if not isinstance(version_info, dict) or not isinstance(
+            version_info.get("files"), list
+        ):
+            raise AtlasModelError("Failed to read bundle: corrupt index")
+        _check_path_name("model name", version_info.get("model_name"))
+        _check_path_name("version", version_info.get("version"))
+        try:
+            Version(version_info["version"])
+        except InvalidVersion:
+            raise AtlasModelError(
+                f"Failed to read bundle: invalid version {version_info['version']!r}"
+            )
+        for file_info in version_info["files"]:
+            if not isinstance(file_info, dict):
+                raise AtlasModelError("Failed to read bundle: corrupt index")
+            _check_path_name("file name", file_info.get("name"))
+
+
+def read_bundle_index(bundle: BinaryIO) -> Tuple[Dict[str, Any], int]:
+    """Callable function that reads the index at the front of a bundle.
+
+    Parameters
+    ----------
+    bundle: BinaryIO
+        Readable binary stream positioned at the start of the bundle
+
+    Returns
+    -------
+    index: Dict[str, Any]
+        Bundle index
+
+    data_offset: int
+        Position in the bundle where the file data starts
+    """
+    header = bundle.read(_HEADER.size)
+    if len(header) != _HEADER.size:
+        raise AtlasModelError("Failed to read bundle: file is truncated")
+    magic, index_length = _HEADER.unpack(header)
+    if magic != BUNDLE_MAGIC:
+        raise AtlasModelError("Failed to read bundle: not an atlas model bundle")
+
+    try:
+        index = json.loads(bundle.read(index_length).decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as err:
+        raise AtlasModelError(f"Failed to read bundle: corrupt index ({err})")
+    if not isinstance(index, dict) or not isinstance(index.get("versions"), list):
+        raise AtlasModelError("Failed to read bundle: corrupt index")
+    if index.get("format") != BUNDLE_FORMAT:
+        raise AtlasModelError(
+            f"Failed to read bundle: unsupported format {index.get('format')}"
+        )
+    _check_index(index)
+    return index, _HEADER.size + index_length
+
+
+def _copy_file(
+    bundle: BinaryIO, file_info: Dict[str, Any], compression: Optional[str], output
+) -> None:
+    """Streams one file out of the bundle, verifying its size and checksum."""
+    decompressor = zlib.decompressobj() if compression == "zlib" else None
+    checksum, size, remaining = hashlib.sha256(), 0, file_info["length"]
+    while remaining:
+        stored_chunk = bundle.read(min(CHUNK_SIZE, remaining))
+        if not stored_chunk:
+            raise AtlasModelError("Failed to read bundle: file is truncated")
+        remaining -= len(stored_chunk)
+        try:
+            chunk = (
+                decompressor.decompress(stored_chunk) if decompressor else stored_chunk
+            )
+            if decompressor and not remaining:
+                chunk += decompressor.flush()
+        except zlib.error as err:
+            raise AtlasModelError(
+                f"Failed to read bundle: corrupt data for {file_info['name']} ({err})"
+            )
+        checksum.update(chunk)
+        size += len(chunk)
+        if output is not None:
+            output.write(chunk)
+
+    if size != file_info["size"] or checksum.hexdigest() != file_info["sha256"]:
+        raise AtlasModelError(
+            f"Failed to read bundle: checksum mismatch for {file_info['name']}"
+        )
+
+
+def read_bundle_file(
+    bundle: BinaryIO, model_name: str, version: str, file_name: str = "model.pkl"
+) -> bytes:
+    """Callable function that reads a single file of a model version from a seekable
+    bundle, seeking straight to it through the index.
+
+    Parameters
+    ----------
+    bundle: BinaryIO
+        Seekable binary stream positioned at the start of the bundle
+
+    model_name: str
+        Name of model
+
+    version: str
+        Model version
+
+    file_name: str = "model.pkl"
+        Name of the file in the model version
+
+    Returns
+    -------
+    data: bytes
+        File contents
+    """
+    index, data_offset = read_bundle_index(bundle)
+    for version_info in index["versions"]:
+        if (version_info["model_name"], version_info["version"]) != (
+            model_name,
+            version,
+        ):
+            continue
+        for file_info in version_info["files"]:
+            if file_info["name"] != file_name:
+                continue
+            bundle.seek(data_offset + file_info["offset"])
+            data = io.BytesIO()
+            _copy_file(bundle, file_info, index["compression"], data)
+            return data.getvalue()
+
+    raise AtlasModelError(
+        f"Failed to find {model_name} {version} {file_name} in bundle"
+    )
+
+
+def import_bundle(bundle: BinaryIO) -> List[Tuple[str, str]]:
+    """Callable function that streams a bundle into the atlas model repository.
+
+    Every file is verified against its checksum before its version is published, and
+    versions that already exist in the repository are skipped.
+
+    Parameters
+    ----------
+    bundle: BinaryIO
+        Readable binary stream positioned at the start of the bundle
+
+    Returns
+    -------
+    imported_versions: List[Tuple[str, str]]
+        Model name and version of every imported version
+    """
+    index, _ = read_bundle_index(bundle)
+    storage = get_storage()
+    imported_versions = []
+    for version_info in index["versions"]:
+        model_name, version = version_info["model_name"], version_info["version"]
+        if storage.has_version(model_name, version):
+            for file_info in version_info["files"]:
+                _copy_file(bundle, file_info, index["compression"], None)
+            print(f"{model_name} {version} already exists, skipping")
+            continue
+
+        # Files are written to a hidden staged version and published only once all
+        # of them are verified, so readers never see a partial version.
+        staged_version = storage.stage_version(model_name)
+        try:
+            for file_info in version_info["files"]:
+                with storage.open_file(
+                    model_name, staged_version, file_info["name"], "wb"
+                ) as file:
+                    _copy_file(bundle, file_info, index["compression"], file)
+            committed = storage.commit_version(model_name, staged_version, version)
+        except BaseException:
+            storage.delete(model_name, staged_version)
+            raise
+
+        if not committed:
+            storage.delete(model_name, staged_version)
+            print(f"{model_name} {version} already exists, skipping")
+            continue
+
+        imported_versions.append((model_name, version))
+        print(
+            f"{model_name} {version} successfully imported into atlas model repository"
+        )
+
+    return imported_versions
@@ -0,0 +1,509 @@
+import os
+import re
+import shutil
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+from atlas.telemetry import REGISTRY
+
+DEFAULT_CACHE_SIZE = 10 * 1024**3
+PREFETCH_WORKERS = 4
+# Reads of a file evicted between fetching and opening it are retried this many
+# times, then served from the remote tier.
+OPEN_ATTEMPTS = 3
+
+_SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3, "TB": 1024**4}
+
+FileKey = Tuple[str, str, str]
+
+
+class AtlasStorageError(Exception):
+    """Error when calling atlas storage functions"""
+
+
+def parse_size(size: Any) -> int:
+    """Parses a size in bytes given as an integer or a string such as `512MB`.
+
+    Parameters
+    ----------
+    size: Any
+        Size as an integer number of bytes or a string with a unit
+
+    Returns
+    -------
+    size: int
+        Size in bytes
+    """
+    if isinstance(size, int) and not isinstance(size, bool):
+        return size
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?B?)\s*", str(size).upper())
+    if not match:
+        raise AtlasStorageError(f"Failed to parse size '{size}'")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+class StorageBackend(ABC):
+    """Storage Backend Class object.
+
+    Interface for where models are stored. A model has versions, and every version is a
+    flat set of named files. Names starting with a dot are hidden from listings.
+    Subclasses must implement every abstract method, or fail when they are created.
+    """
+
+    @abstractmethod
+    def is_available(self) -> bool:
+        """Whether the storage can be used."""
+
+    @abstractmethod
+    def list_models(self) -> List[str]:
+        """Names of every stored model."""
+
+    @abstractmethod
+    def list_versions(self, model_name: str) -> List[str]:
+        """Unsorted versions of a model, empty if the model doesn't exist."""
+
+    @abstractmethod
+    def list_files(self, model_name: str, version: str) -> List[str]:
+        """Names of the files in a model version."""
+
+    @abstractmethod
+    def create_version(self, model_name: str, version: str) -> bool:
+        """Atomically claims a new model version. Returns False if it already exists."""
+
+    def stage_version(self, model_name: str) -> str:
+        """Creates a hidden version to write files into before they are published with
+        `commit_version`, and returns its name."""
+        staged_version = f".staged-{uuid.uuid4().hex}"
+        self.create_version(model_name, staged_version)
+        return staged_version
+
+    @abstractmethod
+    def commit_version(
+        self, model_name: str, staged_version: str, version: str
+    ) -> bool:
+        """Atomically publishes a staged version under its final version. Returns False,
+        leaving the staged version in place, if the version already exists."""
+
+    @abstractmethod
+    def open_file(
+        self, model_name: str, version: str, file_name: str, mode: str = "rb"
+    ) -> IO:
+        """Opens a file of a model version for reading or writing."""
+
+    @abstractmethod
+    def file_size(self, model_name: str, version: str, file_name: str) -> int:
+        """Size in bytes of a file of a model version."""
+
+    @abstractmethod
+    def file_mtime(self, model_name: str, version: str, file_name: str) -> float:
+        """Last modification time of a file of a model version."""
+
+    @abstractmethod
+    def delete(self, model_name: str, version: Optional[str] = None) -> None:
+        """Deletes a model version, or every version of a model if version is None."""
+
+    def has_model(self, model_name: str) -> bool:
+        """Whether a model has any stored version."""
+        return model_name in self.list_models()
+
+    def has_version(self, model_name: str, version: str) -> bool:
+        """Whether a model version is stored."""
+        return version in self.list_versions(model_name)
+
+    def prefetch(  # pylint: disable=unused-argument
+        self, model_name: str, versions: List[str]
+    ) -> List[Future]:
+        """Starts moving model versions closer to where they are read. Backends with
+        a single tier have nothing to do and return completed futures."""
+        futures: List[Future] = []
+        for _ in versions:
+            future: Future = Future()
+            future.set_result(None)
+            futures.append(future)
+        return futures
+
+
+class LocalStorage(StorageBackend):
+    """Local Storage Class object.
+
+    Stores models in a directory as `<root>/<model_name>/<version>/<file_name>`.
+    """
+
+    def __init__(self, root_path: str):
+        self.root_path = root_path
+
+    def path(self, *parts: str) -> str:
+        """Path of a model, version or file in the storage directory."""
+        return os.path.join(self.root_path, *parts)
+
+    def is_available(self) -> bool:
+        return os.path.isdir(self.root_path)
+
+    def list_models(self) -> List[str]:
+        if not os.path.isdir(self.root_path):
+            return []
+        return [name for name in os.listdir(self.root_path) if not name.startswith(".")]
+
+    def list_versions(self, model_name: str) -> List[str]:
+        model_path = self.path(model_name)
+        if not os.path.isdir(model_path):
+            return []
+        return [name for name in os.listdir(model_path) if not name.startswith(".")]
+
+    def list_files(self, model_name: str, version: str) -> List[str]:
+        return os.listdir(self.path(model_name, version))
+
+    def create_version(self, model_name: str, version: str) -> bool:
+        os.makedirs(self.path(model_name), exist_ok=True)
+        try:
+            os.mkdir(self.path(model_name, version))
+        except FileExistsError:
+            return False
+        return True
+
+    def commit_version(
+        self, model_name: str, staged_version: str, version: str
+    ) -> bool:
+        version_path = self.path(model_name, version)
+        if os.path.exists(version_path):
+            return False
+        try:
+            os.rename(self.path(model_name, staged_version), version_path)
+        except OSError:
+            # The version was created in the meantime and isn't empty.
+            return False
+        return True
+
+    def open_file(
+        self, model_name: str, version: str, file_name: str, mode: str = "rb"
+    ) -> IO:
+        # pylint: disable-next=consider-using-with
+        return open(self.path(model_name, version, file_name), mode)
+
+    def file_size(self, model_name: str, version: str, file_name: str) -> int:
+        return os.path.getsize(self.path(model_name, version, file_name))
+
+    def file_mtime(self, model_name: str, version: str, file_name: str) -> float:
+        return os.path.getmtime(self.path(model_name, version, file_name))
+
+    def delete(self, model_name: str, version: Optional[str] = None) -> None:
+        if version is None:
+            shutil.rmtree(self.path(model_name))
+        else:
+            shutil.rmtree(self.path(model_name, version))
+
+
+class _TeeFile:
+    """File-like object that writes to the local and remote copies of a file at once,
+    and registers the local copy with the cache once closed."""
+
+    def __init__(self, files: List[IO], on_close):
+        self.files = files
+        self.on_close = on_close
+
+    def write(self, data) -> int:
+        for file in self.files:
+            file.write(data)
+        return len(data)
+
+    def close(self) -> None:
+        for file in self.files:
+            file.close()
+        self.on_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "atlas_storage_cache_requests_total",
+    "Reads of model files through the local tier, by hit or miss.",
+    ["result"],
+)
+CACHE_EVICTIONS = REGISTRY.counter(
+    "atlas_storage_cache_evictions_total",
+    "Model files evicted from the local tier.",
+)
+BYTES_DOWNLOADED = REGISTRY.counter(
+    "atlas_storage_bytes_downloaded_total",
+    "Bytes copied from the remote tier into the local tier.",
+)
+
+
+class TieredStorage(StorageBackend):  # pylint: disable=too-many-instance-attributes
+    """Tiered Storage Class object.
+
+    Keeps a size-bounded, least recently used cache of model files in a fast local tier
+    in front of a slower remote tier. The remote tier holds every version and is the
+    source of truth for listings; writes go to both tiers.
+    """
+
+    def __init__(
+        self,
+        local: LocalStorage,
+        remote: StorageBackend,
+        max_bytes: int = DEFAULT_CACHE_SIZE,
+    ):
+        self.local = local
+        self.remote = remote
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._cached_files: Optional[OrderedDict[FileKey, int]] = None
+        self._cached_bytes = 0
+        self._in_flight: Dict[FileKey, Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _load_cache_index(self) -> "OrderedDict[FileKey, int]":
+        """Internal function that indexes the files already in the local tier, least
+        recently used first. Must be called with the lock held."""
+        if self._cached_files is None:
+            cached_files = []
+            for model_name in self.local.list_models():
+                for version in self.local.list_versions(model_name):
+                    for file_name in self.local.list_files(model_name, version):
+                        if file_name.startswith("."):
+                            continue
+                        path = self.local.path(model_name, version, file_name)
+                        stat = os.stat(path)
+                        cached_files.append(
+                            (
+                                stat.st_mtime,
+                                (model_name, version, file_name),
+                                stat.st_size,
+                            )
+                        )
+            cached_files.sort()
+            self._cached_files = OrderedDict(
+                (key, size) for _, key, size in cached_files
+            )
+            self._cached_bytes = sum(self._cached_files.values())
+        return self._cached_files
+
+    def _add_to_cache(self, key: FileKey) -> None:
+        """Internal function that registers a file in the local tier as most recently
+        used and evicts the least recently used files over the size limit."""
+        size = self.local.file_size(*key)
+        with self._lock:
+            cached_files = self._load_cache_index()
+            self._cached_bytes += size - cached_files.pop(key, 0)
+            cached_files[key] = size
+            while self._cached_bytes > self.max_bytes and len(cached_files) > 1:
+                evicted_key, evicted_size = cached_files.popitem(last=False)
+                self._cached_bytes -= evicted_size
+                CACHE_EVICTIONS.inc()
+                try:
+                    os.remove(self.local.path(*evicted_key))
+                except FileNotFoundError:
+                    pass
+
+    def _touch(self, key: FileKey) -> bool:
+        """Internal function that marks a cached file as most recently used. Returns
+        False if the file isn't in the local tier."""
+        path = self.local.path(*key)
+        with self._lock:
+            cached_files = self._load_cache_index()
+            if key not in cached_files or not os.path.exists(path):
+                return False
+            cached_files.move_to_end(key)
+        # Persists the recency for the next process that indexes the cache.
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by another thread since the check.
+            return False
+        return True
+
+    def _download(self, key: FileKey) -> None:
+        """Internal function that copies a file from the remote to the local tier."""
+        model_name, version, file_name = key
+        os.makedirs(
+            self.local.path(model_name, version),
+            exist_ok=True,
+        )
+        tmp_name = f".{file_name}.{threading.get_ident()}.download"
+        try:
+            with self.remote.open_file(*key) as source, self.local.open_file(
+                model_name, version, tmp_name, "wb"
+            ) as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+                BYTES_DOWNLOADED.inc(target.tell())
+            os.replace(
+                self.local.path(model_name, version, tmp_name),
+                self.local.path(*key),
+            )
+        except BaseException:
+            try:
+                os.remove(self.local.path(model_name, version, tmp_name))
+            except FileNotFoundError:
+                pass
+            raise
+        self._add_to_cache(key)
+
+    def fetch(self, key: FileKey) -> bool:
+        """Callable function that makes sure a file is in the local tier, downloading
+        it if needed. Concurrent fetches of the same file share one download.
+
+        Parameters
+        ----------
+        key: FileKey
+            Model name, version and file name
+
+        Returns
+        -------
+        : bool
+            True if the file was already in the local tier
+        """
+        if self._touch(key):
+            CACHE_REQUESTS.inc(result="hit")
+            return True
+
+        CACHE_REQUESTS.inc(result="miss")
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+
+        if not owner:
+            future.result()
+            return False
+
+        try:
+            self._download(key)
+            future.set_result(None)
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return False
+
+    def is_available(self) -> bool:
+        return self.remote.is_available()
+
+    def list_models(self) -> List[str]:
+        return self.remote.list_models()
+
+    def list_versions(self, model_name: str) -> List[str]:
+        return self.remote.list_versions(model_name)
+
+    def list_files(self, model_name: str, version: str) -> List[str]:
+        return self.remote.list_files(model_name, version)
+
+    def create_version(self, model_name: str, version: str) -> bool:
+        if not self.remote.create_version(model_name, version):
+            return False
+        os.makedirs(
+            self.local.path(model_name, version),
+            exist_ok=True,
+        )
+        return True
+
+    def open_file(
+        self, model_name: str, version: str, file_name: str, mode: str = "rb"
+    ) -> IO:
+        key = (model_name, version, file_name)
+        if "r" in mode:
+            # Another read or a prefetch can evict the file between fetching and
+            # opening it. Once open, it stays readable even if evicted.
+            for _ in range(OPEN_ATTEMPTS):
+                self.fetch(key)
+                try:
+                    return self.local.open_file(*key, mode)
+                except FileNotFoundError:
+                    continue
+            return self.remote.open_file(*key, mode)
+
+        return _TeeFile(
+            [self.local.open_file(*key, mode), self.remote.open_file(*key, mode)],
+            lambda: self._add_to_cache(key),
+        )
+
+    def file_size(self, model_name: str, version: str, file_name: str) -> int:
+        return self.remote.file_size(model_name, version, file_name)
+
+    def file_mtime(self, model_name: str, version: str, file_name: str) -> float:
+        return self.remote.file_mtime(model_name, version, file_name)
+
+    def commit_version(
+        self, model_name: str, staged_version: str, version: str
+    ) -> bool:
+        if not self.remote.commit_version(model_name, staged_version, version):
+            return False
+        # The local copy follows the remote one, with its cache entries.
+        with self._lock:
+            cached_files = self._load_cache_index()
+            for key in list(cached_files):
+                if key[:2] == (model_name, staged_version):
+                    self._cached_bytes -= cached_files.pop(key)
+        if self.local.commit_version(model_name, staged_version, version):
+            for file_name in self.local.list_files(model_name, version):
+                if not file_name.startswith("."):
+                    self._add_to_cache((model_name, version, file_name))
+        elif os.path.isdir(self.local.path(model_name, staged_version)):
+            # A stale local copy is in the way, files are fetched on first read instead.
+            self.local.delete(model_name, staged_version)
+        return True
+
+    def delete(self, model_name: str, version: Optional[str] = None) -> None:
+        self.remote.delete(model_name, version)
+        with self._lock:
+            cached_files = self._load_cache_index()
+            for key in list(cached_files):
+                if key[0] == model_name and version in (None, key[1]):
+                    self._cached_bytes -= cached_files.pop(key)
+        if version is None:
+            if os.path.isdir(self.local.path(model_name)):
+                self.local.delete(model_name)
+        elif os.path.isdir(self.local.path(model_name, version)):
+            self.local.delete(model_name, version)
+
+    def prefetch(self, model_name: str, versions: List[str]) -> List[Future]:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=PREFETCH_WORKERS, thread_name_prefix="atlas-prefetch"
+                )
+        return [
+            self._executor.submit(self.fetch, (model_name, version, file_name))
+            for version in versions
+            for file_name in self.remote.list_files(model_name, version)
+        ]
+
+
+def build_storage(
+    local_path: str, storage_info: Optional[Dict[str, Any]]
+) -> StorageBackend:
+    """Builds the storage backend for the model repository.
+
+    Parameters
+    ----------
+    local_path: str
+        Path of the local model repository
+
+    storage_info: Optional[Dict[str, Any]]
+        `storage` section of atlas-config.yaml. If it sets a `remote` directory, the
+        local model repository becomes a cache of at most `cache_size` in front of it
+
+    Returns
+    -------
+    storage: StorageBackend
+        Storage backend
+    """
+    local = LocalStorage(local_path)
+    if not storage_info or not storage_info.get("remote"):
+        return local
+
+    return TieredStorage(
+        local,
+        LocalStorage(storage_info["remote"]),
+        parse_size(storage_info.get("cache_size", DEFAULT_CACHE_SIZE)),
+    )
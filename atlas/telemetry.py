@@ -0,0 +1,343 @@
+import bisect
+import contextlib
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import ContextManager, Dict, List, Optional, Sequence, Tuple
+
+import click
+
+from atlas.utils.atlas_config import ATLAS_HIDDEN_DIRECTORY
+from atlas.utils.system_utils import get_root_dir
+
+root_dir = get_root_dir()
+atlas_folder_path = os.path.join(root_dir, ATLAS_HIDDEN_DIRECTORY)
+default_textfile_path = os.path.join(atlas_folder_path, "metadata", "metrics.prom")
+
+METRICS_ENV = "ATLAS_METRICS"
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+    math.inf,
+)
+
+LabelValues = Tuple[str, ...]
+
+# Returned by `Histogram.time` while disabled, so timing a block allocates nothing.
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+def _format_labels(label_names: Sequence[str], label_values: LabelValues) -> str:
+    """Formats label pairs as `{name="value",...}`, escaped as Prometheus expects."""
+    if not label_names:
+        return ""
+    pairs = []
+    for name, value in zip(label_names, label_values):
+        value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    """Counter Class object. A total that only goes up, per set of label values."""
+
+    metric_type = "counter"
+
+    def __init__(
+        self,
+        registry: "MetricsRegistry",
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+    ):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Callable function that increases the counter. Does nothing when the registry
+        is disabled.
+
+        Parameters
+        ----------
+        amount: float = 1.0
+            Amount to add
+
+        labels: str
+            Value of every label of the counter
+        """
+        if not self.registry.enabled:
+            return
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> List[str]:
+        """Callable function that renders the counter samples in text format."""
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class _Timer:
+    """Context manager that observes the time spent in its block in a histogram."""
+
+    def __init__(self, histogram: "Histogram", labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class Histogram:
+    """Histogram Class object. Counts observations, such as latencies, in buckets."""
+
+    metric_type = "histogram"
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        registry: "MetricsRegistry",
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        if self.buckets[-1] != math.inf:
+            self.buckets += (math.inf,)
+        # Per label values: observation count of every bucket, then the sum.
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Callable function that records one observation. Does nothing when the
+        registry is disabled.
+
+        Parameters
+        ----------
+        value: float
+            Observed value
+
+        labels: str
+            Value of every label of the histogram
+        """
+        if not self.registry.enabled:
+            return
+        key = tuple(str(labels[name]) for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            bucket_counts, total = self._values.setdefault(
+                key, ([0] * len(self.buckets), [0.0])
+            )
+            bucket_counts[index] += 1
+            total[0] += value
+
+    def time(self, **labels: str) -> ContextManager:
+        """Callable function that returns a context manager observing the time spent in
+        its block, in seconds.
+
+        Parameters
+        ----------
+        labels: str
+            Value of every label of the histogram
+        """
+        if not self.registry.enabled:
+            return _NULL_CONTEXT
+        return _Timer(self, labels)
+
+    def collect(self) -> List[str]:
+        """Callable function that renders the histogram samples in text format."""
+        with self._lock:
+            values = sorted(
+                (key, (list(bucket_counts), total[0]))
+                for key, (bucket_counts, total) in self._values.items()
+            )
+
+        samples = []
+        for key, (bucket_counts, total) in values:
+            cumulative_count = 0
+            for bucket, count in zip(self.buckets, bucket_counts):
+                cumulative_count += count
+                labels = _format_labels(
+                    self.label_names + ("le",), key + (_format_value(bucket),)
+                )
+                samples.append(f"{self.name}_bucket{labels} {cumulative_count}")
+            labels = _format_labels(self.label_names, key)
+            samples.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            samples.append(f"{self.name}_count{labels} {cumulative_count}")
+        return samples
+
+
+class MetricsRegistry:
+    """Metrics Registry Class object.
+
+    Holds the counters and histograms of atlas and exports them in the Prometheus text
+    format. While disabled, updating a metric returns straight away.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.metrics: Dict[str, "Counter | Histogram"] = {}
+
+    def counter(
+        self, name: str, documentation: str, label_names: Sequence[str] = ()
+    ) -> Counter:
+        """Callable function that registers a counter."""
+        metric = Counter(self, name, documentation, label_names)
+        self.metrics[name] = metric
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Callable function that registers a histogram."""
+        metric = Histogram(self, name, documentation, label_names, buckets)
+        self.metrics[name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Callable function that renders every metric in the Prometheus text format.
+
+        Returns
+        -------
+        : str
+        """
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.metric_type}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Callable function that writes every metric to a file in the Prometheus text
+        format. The file is replaced atomically, so scrapers never see a partial file.
+
+        Parameters
+        ----------
+        path: str
+            Path of the text file
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            file.write(self.render())
+        os.replace(tmp_path, path)
+
+    def start_http_server(
+        self, port: int, address: str = "127.0.0.1"
+    ) -> ThreadingHTTPServer:
+        """Callable function that serves every metric at `/metrics` from a background
+        thread.
+
+        Parameters
+        ----------
+        port: int
+            Port to listen on
+
+        address: str = "127.0.0.1"
+            Address to listen on
+
+        Returns
+        -------
+        server: ThreadingHTTPServer
+            Running server, stopped with `shutdown()`
+        """
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            """Request handler for the /metrics endpoint"""
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):  # pylint: disable=arguments-differ
+                return
+
+        server = ThreadingHTTPServer((address, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+REGISTRY = MetricsRegistry(enabled=os.environ.get(METRICS_ENV) == "1")
+
+
+def configure_telemetry(telemetry_info: Optional[dict]) -> Optional[str]:
+    """Callable function that enables the metrics registry from the `telemetry` section
+    of atlas-config.yaml (or the ATLAS_METRICS=1 environment variable) and starts the
+    `/metrics` endpoint if a port is set. If the port can't be used, the run goes on
+    without the endpoint.
+
+    Parameters
+    ----------
+    telemetry_info: Optional[dict]
+        `telemetry` section of atlas-config.yaml
+
+    Returns
+    -------
+    textfile_path: Optional[str]
+        Path to write the metrics to at the end of the run, None if disabled
+    """
+    telemetry_info = telemetry_info or {}
+    if telemetry_info.get("enabled"):
+        REGISTRY.enabled = True
+    if not REGISTRY.enabled:
+        return None
+
+    if telemetry_info.get("port"):
+        try:
+            REGISTRY.start_http_server(telemetry_info["port"])
+        except OSError as err:
+            # The run goes on, its metrics are still written to the text file.
+            click.echo(
+                click.style("ERROR", fg="red")
+                + f": Failed to serve metrics on port {telemetry_info['port']}: {err}"
+            )
+    return telemetry_info.get("textfile", default_textfile_path)
@@ -0,0 +1,393 @@
+import atexit
+import contextlib
+import contextvars
+import os
+import struct
+import sys
+import threading
+import time
+import uuid
+import zlib
+from array import array
+from typing import Dict, Iterator, Optional, Tuple
+
+from atlas.utils.atlas_config import ATLAS_HIDDEN_DIRECTORY
+from atlas.utils.system_utils import get_root_dir
+
+root_dir = get_root_dir()
+atlas_folder_path = os.path.join(root_dir, ATLAS_HIDDEN_DIRECTORY)
+metadata_path = os.path.join(atlas_folder_path, "metadata")
+
+RUN_ID_ENV = "ATLAS_RUN_ID"
+METRICS_LOG_EXTENSION = ".metrics"
+
+# Every flush appends one frame: payload length and crc32, then the payload. A frame
+# cut short by a crash fails its length or crc check and ends the log at that point.
+_FRAME_HEADER = struct.Struct("<II")
+# Payload records: a name record assigns an id to a metric name, and a point record
+# stores one (step, value) of a metric by that id. Ids are scoped to their frame, so
+# several writers (e.g. a resumed run) can append to the same log.
+_NAME_RECORD = struct.Struct("<BHH")
+_POINT_RECORD = struct.Struct("<BHqd")
+_NAME_KIND = 0
+_POINT_KIND = 1
+_MAX_NAME_LENGTH = _MAX_NAME_ID = 2**16 - 1
+_MIN_STEP, _MAX_STEP = -(2**63), 2**63 - 1
+
+MetricSeries = Tuple[array, array]
+
+
+class AtlasTrackingError(Exception):
+    """Error when calling atlas tracking functions"""
+
+
+class MetricLogger:  # pylint: disable=too-many-instance-attributes
+    """Metric Logger Class object.
+
+    Buffers metric points in memory and appends them in batches, from a background
+    thread, to a binary log file. When the log already exists, automatic steps carry
+    on from the steps in it.
+    """
+
+    def __init__(
+        self, log_path: str, flush_interval: float = 1.0, flush_size: int = 10000
+    ):
+        self.log_path = log_path
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._buffer: list[tuple[str, int, float]] = []
+        self._next_steps: dict[str, int] = {}
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        if os.path.isfile(log_path):
+            with open(log_path, "rb") as file:
+                data = file.read()
+            series, end_offset = _parse_metrics_log(data)
+            # Drops a partial frame left by a crash, which would otherwise hide every
+            # frame appended after it from readers.
+            if end_offset < len(data):
+                os.truncate(log_path, end_offset)
+            for name, (steps, _) in series.items():
+                if steps:
+                    self._next_steps[name] = max(steps) + 1
+        # Unbuffered, so every frame reaches the file in a single write call.
+        self._file = open(  # pylint: disable=consider-using-with
+            log_path, "ab", buffering=0
+        )
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+
+    def log(self, name: str, value: float, step: Optional[int] = None) -> None:
+        """Callable function that buffers one metric point.
+
+        Parameters
+        ----------
+        name: str
+            Name of metric
+
+        value: float
+            Metric value
+
+        step: Optional[int] = None
+            Training step. If None, the step after the metric's last step is used
+
+        Values and steps are checked here, so a bad point raises in the caller instead
+        of in the background thread.
+        """
+        try:
+            value = float(value)
+        except (TypeError, ValueError) as err:
+            raise AtlasTrackingError(f"Invalid value for metric {name}: {err}")
+        if step is not None and (
+            not isinstance(step, int) or not _MIN_STEP <= step <= _MAX_STEP
+        ):
+            raise AtlasTrackingError(f"Invalid step for metric {name}: {step!r}")
+
+        with self._buffer_lock:
+            if name not in self._next_steps:
+                if not isinstance(name, str) or (
+                    len(name.encode("utf-8")) > _MAX_NAME_LENGTH
+                ):
+                    raise AtlasTrackingError(f"Invalid metric name: {name!r}")
+            if step is None:
+                step = self._next_steps.get(name, 0)
+            self._next_steps[name] = step + 1
+            self._buffer.append((name, step, value))
+            if len(self._buffer) >= self.flush_size:
+                self._wake.set()
+
+    def flush(self) -> None:
+        """Callable function that appends the buffered points to the log as one frame."""
+        with self._flush_lock:
+            with self._buffer_lock:
+                points, self._buffer = self._buffer, []
+            if not points or self._file.closed:
+                return
+
+            records = []
+            name_ids: dict[str, int] = {}
+            for index, (name, step, value) in enumerate(points):
+                name_id = name_ids.get(name)
+                if name_id is None:
+                    if len(name_ids) > _MAX_NAME_ID:
+                        # Out of ids for this frame, the rest goes in the next one.
+                        with self._buffer_lock:
+                            self._buffer[:0] = points[index:]
+                        points = points[:index]
+                        break
+                    name_id = name_ids[name] = len(name_ids)
+                    encoded_name = name.encode("utf-8")
+                    records.append(
+                        _NAME_RECORD.pack(_NAME_KIND, name_id, len(encoded_name))
+                    )
+                    records.append(encoded_name)
+                records.append(_POINT_RECORD.pack(_POINT_KIND, name_id, step, value))
+
+            payload = b"".join(records)
+            try:
+                self._file.write(
+                    _FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+                )
+            except OSError:
+                # Keeps the points for the next flush.
+                with self._buffer_lock:
+                    self._buffer[:0] = points
+                raise
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as err:  # pylint: disable=broad-except
+                # Keeps flushing later points, e.g. after a full disk frees up.
+                print(
+                    f"Failed to write metrics to {self.log_path}: {err}",
+                    file=sys.stderr,
+                )
+
+    def close(self) -> None:
+        """Callable function that flushes the remaining points and closes the log."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        self._file.close()
+
+
+def read_metrics_log(log_path: str) -> Dict[str, MetricSeries]:
+    """Callable function that reads every metric series in a metrics log.
+
+    Parameters
+    ----------
+    log_path: str
+        Path of the metrics log
+
+    Returns
+    -------
+    series: Dict[str, MetricSeries]
+        Metric names mapped to arrays of their steps and values
+    """
+    with open(log_path, "rb") as file:
+        return _parse_metrics_log(file.read())[0]
+
+
+def _parse_metrics_log(data: bytes) -> Tuple[Dict[str, MetricSeries], int]:
+    """Parses the frames of a metrics log up to the first partial or corrupt one, and
+    returns the metric series with the offset where the valid frames end."""
+    series: Dict[str, MetricSeries] = {}
+    offset = 0
+    while offset + _FRAME_HEADER.size <= len(data):
+        length, checksum = _FRAME_HEADER.unpack_from(data, offset)
+        payload = data[
+            offset + _FRAME_HEADER.size : offset + _FRAME_HEADER.size + length
+        ]
+        if len(payload) != length or zlib.crc32(payload) != checksum:
+            break
+        offset += _FRAME_HEADER.size + length
+
+        names: dict[int, str] = {}
+        position = 0
+        while position < length:
+            if payload[position] == _NAME_KIND:
+                _, name_id, name_length = _NAME_RECORD.unpack_from(payload, position)
+                position += _NAME_RECORD.size
+                name = payload[position : position + name_length].decode("utf-8")
+                names[name_id] = name
+                series.setdefault(name, (array("q"), array("d")))
+                position += name_length
+            else:
+                _, name_id, step, value = _POINT_RECORD.unpack_from(payload, position)
+                position += _POINT_RECORD.size
+                steps, values = series[names[name_id]]
+                steps.append(step)
+                values.append(value)
+
+    return series, offset
+
+
+class _VariantRun:
+    """Run of a matrix variant running in-process, with its own metric logger."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.logger: Optional[MetricLogger] = None
+        self.lock = threading.Lock()
+
+
+_run_id: Optional[str] = None
+_logger: Optional[MetricLogger] = None
+_logger_lock = threading.Lock()
+# Set while a variant of an `entry` stage runs, so the variants sharing this process
+# keep their metrics apart like variants running in their own interpreter do.
+_variant_run: contextvars.ContextVar[Optional[_VariantRun]] = contextvars.ContextVar(
+    "atlas_variant_run", default=None
+)
+
+
+def get_run_id() -> str:
+    """Callable function that returns the id of the current run, taken from the
+    ATLAS_RUN_ID environment variable or generated once per run. Variants of `entry`
+    stages have their own run id, `<run id>-<variant index>`."""
+    global _run_id  # pylint: disable=global-statement
+    variant_run = _variant_run.get()
+    if variant_run is not None:
+        return variant_run.run_id
+    if _run_id is None:
+        # Not exported to the environment, so subprocesses such as matrix stage
+        # variants get runs (and log files) of their own.
+        _run_id = os.environ.get(RUN_ID_ENV) or (
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        )
+    return _run_id
+
+
+def start_run() -> None:
+    """Callable function that ends the current run, flushing its metrics, so the next
+    metric logged or model saved in this process belongs to a new run. Called by
+    the pipeline before every run, e.g. every re-run of `atlas run --watch`."""
+    global _run_id, _logger  # pylint: disable=global-statement
+    with _logger_lock:
+        if _logger is not None:
+            _logger.close()
+        _logger = None
+        _run_id = None
+
+
+@contextlib.contextmanager
+def variant_run(index: int) -> Iterator[None]:
+    """Context manager that gives code running in the current context (thread or
+    asyncio task) a run of its own for a matrix variant, closing its metric logger on
+    exit.
+
+    Parameters
+    ----------
+    index: int
+        Index of the variant
+    """
+    run = _VariantRun(f"{get_run_id()}-{index}")
+    token = _variant_run.set(run)
+    try:
+        yield
+    finally:
+        _variant_run.reset(token)
+        with run.lock:
+            if run.logger is not None:
+                run.logger.close()
+
+
+def get_metrics_log_path(run_id: str) -> str:
+    """Path of the metrics log of a run."""
+    return os.path.join(metadata_path, run_id + METRICS_LOG_EXTENSION)
+
+
+def get_metric_logger() -> MetricLogger:
+    """Callable function that returns the metric logger of the current run, creating
+    it on first use."""
+    global _logger  # pylint: disable=global-statement
+    run = _variant_run.get()
+    if run is not None:
+        with run.lock:
+            if run.logger is None:
+                run.logger = MetricLogger(get_metrics_log_path(run.run_id))
+            return run.logger
+
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                _logger = MetricLogger(get_metrics_log_path(get_run_id()))
+                atexit.register(_logger.close)
+    return _logger
+
+
+def get_active_run_id() -> Optional[str]:
+    """Callable function that flushes the metric logger of the current run and returns
+    the run id, or None if no metrics were logged in this run."""
+    run = _variant_run.get()
+    metric_logger = _logger if run is None else run.logger
+    if metric_logger is None:
+        return None
+    metric_logger.flush()
+    return get_run_id()
+
+
+def log_metric(name: str, value: float, step: Optional[int] = None) -> None:
+    """Callable function that logs one metric point for the current run.
+
+    Parameters
+    ----------
+    name: str
+        Name of metric
+
+    value: float
+        Metric value
+
+    step: Optional[int] = None
+        Training step. If None, the step after the metric's last step is used
+    """
+    get_metric_logger().log(name, value, step)
+
+
+def log_metrics(metrics: Dict[str, float], step: Optional[int] = None) -> None:
+    """Callable function that logs several metrics at the same step for the current run.
+
+    Parameters
+    ----------
+    metrics: Dict[str, float]
+        Metric names mapped to their values
+
+    step: Optional[int] = None
+        Training step. If None, the step after each metric's last step is used
+    """
+    metric_logger = get_metric_logger()
+    for name, value in metrics.items():
+        metric_logger.log(name, value, step)
+
+
+def read_metrics(run_id: Optional[str] = None) -> Dict[str, MetricSeries]:
+    """Callable function that reads every metric series logged in a run.
+
+    Parameters
+    ----------
+    run_id: Optional[str] = None
+        Run id. If None, the current run is read
+
+    Returns
+    -------
+    series: Dict[str, MetricSeries]
+        Metric names mapped to arrays of their steps and values
+    """
+    if run_id is None:
+        run_id = get_active_run_id() or get_run_id()
+
+    log_path = get_metrics_log_path(run_id)
+    if not os.path.isfile(log_path):
+        raise AtlasTrackingError(f"Failed to find metrics of run {run_id}")
+    return read_metrics_log(log_path)
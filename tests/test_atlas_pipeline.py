@@ -0,0 +1,246 @@
+import importlib
+import sys
+import time
+
+import pytest
+
+import atlas.matrix
+from atlas.atlas_pipeline import AtlasPipeline, AtlasPipelineError
+from atlas.storage import LocalStorage
+
+model_module = importlib.import_module("atlas.model")
+tracking_module = importlib.import_module("atlas.tracking")
+
+
+def make_stages(tmp_path, graph, roots):
+    log_path = tmp_path / "log.txt"
+    project_stages = {}
+    for stage_name, next_stages in graph.items():
+        script = tmp_path / f"{stage_name}.py"
+        script.write_text(
+            f"with open({str(log_path)!r}, 'a') as log:\n    log.write('{stage_name}\\n')\n"
+        )
+        project_stages[stage_name] = {"script": str(script), "next_stages": next_stages}
+        if stage_name in roots:
+            project_stages[stage_name]["root"] = True
+    return project_stages, log_path
+
+
+def test_run_atlas_fan_in_and_multiple_leaves(tmp_path):
+    project_stages, log_path = make_stages(
+        tmp_path,
+        {"a": ["b", "c"], "b": ["d"], "c": ["d", "e"], "d": None, "e": None},
+        roots=["a"],
+    )
+
+    AtlasPipeline(project_stages).run_atlas()
+
+    assert log_path.read_text().split() == ["a", "b", "c", "d", "e"]
+
+
+def test_run_atlas_multiple_roots(tmp_path):
+    project_stages, log_path = make_stages(
+        tmp_path,
+        {"a": ["c"], "b": ["c"], "c": None, "unreachable": None},
+        roots=["a", "b"],
+    )
+
+    AtlasPipeline(project_stages).run_atlas()
+
+    assert log_path.read_text().split() == ["a", "b", "c"]
+
+
+def test_execution_levels_and_critical_path(tmp_path):
+    project_stages, _ = make_stages(
+        tmp_path,
+        {"a": ["b", "c"], "b": ["d"], "c": ["e"], "e": ["d"], "d": None},
+        roots=["a"],
+    )
+    pipeline = AtlasPipeline(project_stages)
+    stage_names = pipeline.execution_order()
+
+    assert pipeline.execution_levels(stage_names) == [["a"], ["b", "c"], ["e"], ["d"]]
+    assert pipeline.critical_path(stage_names) == ["a", "c", "e", "d"]
+
+
+def test_pipeline_cycle(tmp_path):
+    project_stages, _ = make_stages(
+        tmp_path, {"a": ["b"], "b": ["c"], "c": ["b"]}, roots=["a"]
+    )
+
+    with pytest.raises(AtlasPipelineError, match="cycle through stages: b, c"):
+        AtlasPipeline(project_stages)
+
+
+def test_pipeline_unknown_next_stage(tmp_path):
+    project_stages, _ = make_stages(tmp_path, {"a": ["missing"]}, roots=["a"])
+
+    with pytest.raises(AtlasPipelineError, match="unknown next stage 'missing'"):
+        AtlasPipeline(project_stages)
+
+
+ENTRY_MODULE = """
+import asyncio
+
+from atlas.matrix import get_stage_params
+from atlas.model import save_model
+from atlas.tracking import log_metric
+
+calls = []
+
+
+async def fetch_a():
+    await asyncio.sleep(0.3)
+    calls.append("fetch_a")
+
+
+async def fetch_b():
+    await asyncio.sleep(0.3)
+    calls.append("fetch_b")
+
+
+def combine():
+    calls.append("combine")
+
+
+async def sweep():
+    await asyncio.sleep(0.01)
+    calls.append(get_stage_params())
+
+
+async def flaky():
+    params = get_stage_params()
+    if params["lr"] > 0.05:
+        raise ValueError("diverged")
+    await asyncio.sleep(0.05)
+    calls.append(params)
+
+
+async def train():
+    lr = get_stage_params()["lr"]
+    for step in range(3):
+        log_metric("loss", lr * step)
+        await asyncio.sleep(0.01)
+    save_model({"lr": lr}, "swept-model")
+"""
+
+
+@pytest.fixture
+def entry_module(tmp_path, monkeypatch):
+    (tmp_path / "atlas_test_entries.py").write_text(ENTRY_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = importlib.import_module("atlas_test_entries")
+    yield module
+    sys.modules.pop("atlas_test_entries", None)
+
+
+def test_run_atlas_entry_stages_overlap(tmp_path, entry_module):
+    project_stages, log_path = make_stages(tmp_path, {"start": ["a", "b"]}, ["start"])
+    project_stages.update(
+        {
+            "a": {"entry": "atlas_test_entries:fetch_a", "next_stages": ["combine"]},
+            "b": {"entry": "atlas_test_entries:fetch_b", "next_stages": ["combine"]},
+            "combine": {"entry": "atlas_test_entries:combine"},
+        }
+    )
+
+    start = time.monotonic()
+    AtlasPipeline(project_stages, concurrency=2).run_atlas()
+
+    assert time.monotonic() - start < 0.55
+    assert log_path.read_text().split() == ["start"]
+    assert sorted(entry_module.calls[:2]) == ["fetch_a", "fetch_b"]
+    assert entry_module.calls[2:] == ["combine"]
+
+
+def test_run_atlas_entry_matrix_stage(tmp_path, entry_module, monkeypatch):
+    monkeypatch.setattr(atlas.matrix, "stage_outputs_path", str(tmp_path / "outputs"))
+    project_stages = {
+        "sweep": {
+            "entry": "atlas_test_entries:sweep",
+            "root": True,
+            "matrix": {"lr": [0.1, 0.01]},
+        }
+    }
+
+    AtlasPipeline(project_stages).run_atlas()
+
+    assert sorted(entry_module.calls, key=lambda params: params["lr"]) == [
+        {"lr": 0.01},
+        {"lr": 0.1},
+    ]
+    assert len(atlas.matrix.get_variant_results("sweep")) == 2
+
+
+def test_run_atlas_unknown_entry(tmp_path):
+    project_stages = {"a": {"entry": "atlas_test_missing:run", "root": True}}
+
+    with pytest.raises(AtlasPipelineError, match="Failed to load entry"):
+        AtlasPipeline(project_stages).run_atlas()
+
+
+def test_run_atlas_entry_matrix_stage_runs(tmp_path, entry_module, monkeypatch):
+    monkeypatch.setattr(atlas.matrix, "stage_outputs_path", str(tmp_path / "outputs"))
+    monkeypatch.setattr(
+        model_module, "_storage", LocalStorage(str(tmp_path / "model_repository"))
+    )
+    monkeypatch.setattr(tracking_module, "metadata_path", str(tmp_path / "metadata"))
+    monkeypatch.setenv(tracking_module.RUN_ID_ENV, "run")
+    monkeypatch.setattr(tracking_module, "_run_id", None)
+    monkeypatch.setattr(tracking_module, "_logger", None)
+    project_stages = {
+        "train": {
+            "entry": "atlas_test_entries:train",
+            "root": True,
+            "matrix": {"lr": [1.0, 2.0]},
+        }
+    }
+
+    AtlasPipeline(project_stages).run_atlas()
+
+    run_ids = {}
+    for result in atlas.matrix.get_variant_results("train"):
+        [saved_model] = result["models"]
+        run_id = model_module.get_model_run_id("swept-model", saved_model["version"])
+        run_ids[result["params"]["lr"]] = run_id
+        steps, values = tracking_module.read_metrics(run_id)["loss"]
+        assert list(steps) == [0, 1, 2]
+        assert list(values) == [result["params"]["lr"] * step for step in range(3)]
+    assert run_ids == {1.0: "run-0", 2.0: "run-1"}
+
+
+def test_run_atlas_entry_matrix_stage_failed_variant(
+    tmp_path, entry_module, monkeypatch
+):
+    monkeypatch.setattr(atlas.matrix, "stage_outputs_path", str(tmp_path / "outputs"))
+    project_stages = {
+        "flaky": {
+            "entry": "atlas_test_entries:flaky",
+            "root": True,
+            "matrix": {"lr": [0.1, 0.01]},
+        }
+    }
+
+    with pytest.raises(AtlasPipelineError, match=r"1 variants failed: flaky\[lr=0.1\]"):
+        AtlasPipeline(project_stages).run_atlas()
+    assert entry_module.calls == [{"lr": 0.01}]
+
+
+def test_run_atlas_script_stage_on_main_thread(tmp_path, entry_module):
+    log_path = tmp_path / "log.txt"
+    script = tmp_path / "signals.py"
+    script.write_text(
+        "import signal, threading\n"
+        "signal.signal(signal.SIGTERM, signal.getsignal(signal.SIGTERM))\n"
+        f"with open({str(log_path)!r}, 'w') as log:\n"
+        "    log.write(threading.current_thread().name)\n"
+    )
+    project_stages = {
+        "signals": {"script": str(script), "root": True, "next_stages": ["combine"]},
+        "combine": {"entry": "atlas_test_entries:combine"},
+    }
+
+    AtlasPipeline(project_stages).run_atlas()
+
+    assert log_path.read_text() == "MainThread"
+    assert entry_module.calls == ["combine"]
@@ -0,0 +1,76 @@
+import os
+
+from atlas.atlas_pipeline import AtlasPipeline
+from atlas.atlas_watcher import AtlasWatcher, path_signature
+
+
+def make_pipeline(tmp_path):
+    for script in ["a.py", "b.py", "c.py", "d.py"]:
+        (tmp_path / script).write_text("x = 1\n")
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "shard.csv").write_text("1,2\n")
+
+    return AtlasPipeline(
+        {
+            "a": {
+                "script": str(tmp_path / "a.py"),
+                "root": True,
+                "next_stages": ["b", "c"],
+            },
+            "b": {
+                "script": str(tmp_path / "b.py"),
+                "next_stages": ["d"],
+                "inputs": [str(tmp_path / "data")],
+            },
+            "c": {"script": str(tmp_path / "c.py"), "next_stages": ["d"]},
+            "d": {"script": str(tmp_path / "d.py")},
+        }
+    )
+
+
+def test_downstream_stages(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+
+    assert pipeline.downstream_stages(["a"]) == ["a", "b", "c", "d"]
+    assert pipeline.downstream_stages(["b"]) == ["b", "d"]
+    assert pipeline.downstream_stages(["c", "b"]) == ["b", "c", "d"]
+
+
+def test_path_signature_missing(tmp_path):
+    assert path_signature(str(tmp_path / "missing.py")) is None
+
+
+def test_watcher_poll_script_change(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    watcher = AtlasWatcher(pipeline, pipeline.downstream_stages(["a"]))
+    assert watcher.poll() == set()
+
+    script = tmp_path / "c.py"
+    script.write_text("x = 2\n")
+    os.utime(script, ns=(0, 10**18))
+
+    assert watcher.poll() == {"c"}
+    assert watcher.poll() == set()
+
+
+def test_watcher_poll_input_change(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    watcher = AtlasWatcher(pipeline, pipeline.downstream_stages(["a"]))
+
+    (tmp_path / "data" / "new_shard.csv").write_text("3,4\n")
+
+    assert watcher.poll() == {"b"}
+
+
+def test_watcher_run_ignores_inputs_written_by_stages(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    (tmp_path / "a.py").write_text(
+        f"with open({str(tmp_path / 'data' / 'shard.csv')!r}, 'a') as shard:\n"
+        "    shard.write('5,6\\n')\n"
+    )
+    watcher = AtlasWatcher(pipeline, pipeline.downstream_stages(["a"]))
+
+    watcher.run(["a"])
+
+    assert (tmp_path / "data" / "shard.csv").read_text() == "1,2\n5,6\n"
+    assert watcher.poll() == set()
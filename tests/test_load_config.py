@@ -52,7 +52,8 @@ def test_validate_config_file_no_script_key():
     }
 
     with pytest.raises(
-        ConfigValidationError, match="Failed to find 'script' key in 'stage1' stage"
+        ConfigValidationError,
+        match="Failed to find 'script' or 'entry' key in 'stage1' stage",
     ):
         validate_config_file(config_info)
 
@@ -74,3 +75,23 @@ def test_validate_config_file_no_root():
         ConfigValidationError, match="Failed to find any root stage in config file"
     ):
         validate_config_file(config_info)
+
+
+def test_validate_config_file_empty_matrix():
+    config_info = {
+        "pipeline": {
+            "stages": {
+                "stage1": {
+                    "script": "stage1.py",
+                    "root": True,
+                    "matrix": {"lr": []},
+                },
+            }
+        }
+    }
+
+    with pytest.raises(
+        ConfigValidationError,
+        match="'matrix' key in 'stage1' stage must map parameter names to non-empty lists",
+    ):
+        validate_config_file(config_info)
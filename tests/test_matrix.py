@@ -0,0 +1,108 @@
+import json
+import os
+
+import pytest
+
+import atlas.matrix
+from atlas.atlas_pipeline import AtlasPipeline, AtlasPipelineError
+from atlas.matrix import expand_matrix, get_variant_results, variant_name
+
+
+def test_expand_matrix():
+    assert expand_matrix({"lr": [0.1, 0.01], "depth": [2]}) == [
+        {"lr": 0.1, "depth": 2},
+        {"lr": 0.01, "depth": 2},
+    ]
+
+
+def test_variant_name():
+    assert variant_name("train", {"lr": 0.1, "depth": 2}) == "train[lr=0.1,depth=2]"
+
+
+def test_run_matrix_stage(tmp_path, monkeypatch):
+    monkeypatch.setattr(atlas.matrix, "stage_outputs_path", str(tmp_path / "outputs"))
+    script = tmp_path / "train.py"
+    script.write_text(
+        "import json, os\n"
+        "params = json.loads(os.environ['ATLAS_STAGE_PARAMS'])\n"
+        f"open(os.path.join({str(tmp_path)!r}, 'lr_' + str(params['lr'])), 'w').close()\n"
+    )
+    pipeline = AtlasPipeline(
+        {
+            "train": {
+                "script": str(script),
+                "root": True,
+                "matrix": {"lr": [0.1, 0.01, 0.001]},
+                "parallelism": 2,
+            }
+        }
+    )
+
+    pipeline.run_atlas()
+
+    for lr in ["0.1", "0.01", "0.001"]:
+        assert (tmp_path / f"lr_{lr}").exists()
+    results = get_variant_results("train")
+    assert [result["params"] for result in results] == [
+        {"lr": 0.1},
+        {"lr": 0.01},
+        {"lr": 0.001},
+    ]
+    assert results[0]["models"] == []
+
+
+def test_run_matrix_stage_records_saved_models(tmp_path, monkeypatch):
+    monkeypatch.setattr(atlas.matrix, "stage_outputs_path", str(tmp_path / "outputs"))
+    # Variants run in their own interpreter, which needs to import this checkout.
+    monkeypatch.setenv("PYTHONPATH", os.path.dirname(os.path.dirname(atlas.__file__)))
+    repository_path = tmp_path / "model_repository"
+    script = tmp_path / "train.py"
+    script.write_text(
+        "from atlas.model import save_model, set_storage\n"
+        "from atlas.storage import LocalStorage\n"
+        f"set_storage(LocalStorage({str(repository_path)!r}))\n"
+        "save_model({'weights': [1, 2]}, 'sweep-model', parameters={'seed': 0})\n"
+    )
+    pipeline = AtlasPipeline(
+        {
+            "train": {
+                "script": str(script),
+                "root": True,
+                "matrix": {"lr": [0.1, 0.01]},
+            }
+        }
+    )
+
+    pipeline.run_atlas()
+
+    results = get_variant_results("train")
+    assert len(results) == 2
+    versions = set()
+    for result in results:
+        [saved_model] = result["models"]
+        assert saved_model["model_name"] == "sweep-model"
+        parameters_path = (
+            repository_path / "sweep-model" / saved_model["version"] / "parameters.json"
+        )
+        assert json.loads(parameters_path.read_text()) == {
+            **result["params"],
+            "seed": 0,
+        }
+        versions.add(saved_model["version"])
+    assert versions == {"0.0.1", "0.0.2"}
+
+
+def test_run_matrix_stage_failed_variant(tmp_path, monkeypatch):
+    monkeypatch.setattr(atlas.matrix, "stage_outputs_path", str(tmp_path / "outputs"))
+    script = tmp_path / "train.py"
+    script.write_text(
+        "import json, os\n"
+        "if json.loads(os.environ['ATLAS_STAGE_PARAMS'])['lr'] > 0.05:\n"
+        "    raise ValueError('diverged')\n"
+    )
+    pipeline = AtlasPipeline(
+        {"train": {"script": str(script), "root": True, "matrix": {"lr": [0.1, 0.01]}}}
+    )
+
+    with pytest.raises(AtlasPipelineError, match=r"1 variants failed: train\[lr=0.1\]"):
+        pipeline.run_atlas()
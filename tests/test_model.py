@@ -0,0 +1,87 @@
+import importlib
+import os
+
+import cloudpickle
+import pytest
+
+from atlas.load_config import ConfigValidationError
+from atlas.model import AtlasModelError, get_model, get_models, load_model, save_model
+from atlas.storage import LocalStorage, TieredStorage
+
+model_module = importlib.import_module("atlas.model")
+
+
+@pytest.fixture
+def repository(tmp_path, monkeypatch):
+    path = tmp_path / "model_repository"
+    monkeypatch.setattr(model_module, "_storage", LocalStorage(str(path)))
+    return path
+
+
+def test_get_model_reads_info_without_unpickling(repository, monkeypatch):
+    save_model(
+        [1, 2, 3],
+        "my-model",
+        parameters={"lr": 0.1},
+        metrics={"accuracy": 0},
+        gems={"features": ["a", "b"]},
+    )
+    save_model([4, 5, 6], "my-model")
+
+    def fail_load(file):
+        raise AssertionError("model.pkl was unpickled")
+
+    monkeypatch.setattr(cloudpickle, "load", fail_load)
+    first, latest = get_models("my-model")
+    version_path = repository / "my-model" / "0.0.1"
+
+    assert latest.version == get_model("my-model").version == "0.0.2"
+    assert first.parameters == {"lr": 0.1}
+    assert first.metrics == {"accuracy": 0}
+    assert first.gems == {"features": ["a", "b"]}
+    assert (version_path / "gems.json").exists()
+    assert latest.parameters == latest.metrics == latest.gems == {}
+    assert first.size_bytes == sum(
+        path.stat().st_size for path in version_path.iterdir()
+    )
+    assert first.created_at.timestamp() == pytest.approx(
+        (version_path / "model.pkl").stat().st_mtime
+    )
+
+
+def test_model_version_load(repository):
+    save_model({"weights": [1, 2, 3]}, "my-model")
+
+    assert get_model("my-model", "0.0.1").load() == {"weights": [1, 2, 3]}
+    assert load_model("my-model") == {"weights": [1, 2, 3]}
+    with pytest.raises(AtlasModelError, match="Failed to find my-model 0.0.2"):
+        get_model("my-model", "0.0.2")
+
+
+def test_model_version_info_skips_model_download(tmp_path, monkeypatch):
+    local = LocalStorage(str(tmp_path / "local"))
+    monkeypatch.setattr(
+        model_module,
+        "_storage",
+        TieredStorage(local, LocalStorage(str(tmp_path / "remote"))),
+    )
+    save_model(list(range(1000)), "my-model", metrics={"accuracy": 0.9})
+    local.delete("my-model")
+    model_version = get_model("my-model")
+
+    assert model_version.metrics == {"accuracy": 0.9}
+    assert model_version.size_bytes > 0
+    assert not os.path.exists(local.path("my-model", "0.0.1", "model.pkl"))
+    assert model_version.load() == list(range(1000))
+
+
+def test_get_storage_invalid_config(monkeypatch):
+    def invalid_config():
+        raise ConfigValidationError("'storage' key must be a mapping")
+
+    monkeypatch.setattr(model_module, "_storage", None)
+    monkeypatch.setattr(model_module, "load_config_file", invalid_config)
+
+    with pytest.raises(AtlasModelError, match="Invalid atlas-config.yaml: 'storage'"):
+        model_module.get_storage()
+    assert model_module._storage is None
@@ -0,0 +1,126 @@
+import importlib
+import io
+import json
+import os
+import struct
+
+import cloudpickle
+import pytest
+
+from atlas.model import AtlasModelError, save_model
+from atlas.model_bundle import (
+    BUNDLE_MAGIC,
+    export_bundle,
+    import_bundle,
+    read_bundle_file,
+)
+from atlas.storage import LocalStorage
+
+model_module = importlib.import_module("atlas.model")
+
+
+@pytest.fixture
+def repository(tmp_path, monkeypatch):
+    def use_repository(name):
+        path = tmp_path / name / "model_repository"
+        path.parent.mkdir(exist_ok=True)
+        monkeypatch.setattr(model_module, "_storage", LocalStorage(str(path)))
+        return path
+
+    return use_repository
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_export_import_bundle(repository, compress):
+    repository("source")
+    save_model({"weights": [1, 2, 3]}, "my-model", parameters={"lr": 0.1})
+    save_model({"weights": [4, 5, 6]}, "my-model", metrics={"accuracy": 0.9})
+    bundle = io.BytesIO()
+    export_bundle("my-model", bundle, compress=compress)
+
+    target = repository("target")
+    bundle.seek(0)
+
+    assert import_bundle(bundle) == [("my-model", "0.0.1"), ("my-model", "0.0.2")]
+    assert (target / "my-model" / "0.0.1" / "parameters.json").read_text() == (
+        '{"lr": 0.1}'
+    )
+    assert (target / "my-model" / "0.0.2" / "metrics.json").exists()
+
+
+def test_read_bundle_file(repository):
+    repository("source")
+    save_model({"weights": [1, 2, 3]}, "my-model")
+    save_model({"weights": [4, 5, 6]}, "my-model")
+    bundle = io.BytesIO()
+    export_bundle("my-model", bundle, versions=["latest"], compress=True)
+    bundle.seek(0)
+
+    model = cloudpickle.loads(read_bundle_file(bundle, "my-model", "0.0.2"))
+
+    assert model == {"weights": [4, 5, 6]}
+
+
+def test_import_corrupted_bundle(repository):
+    repository("source")
+    save_model({"weights": [1, 2, 3]}, "my-model")
+    bundle = io.BytesIO()
+    export_bundle("my-model", bundle)
+    data = bytearray(bundle.getvalue())
+    data[-1] ^= 0xFF
+
+    target = repository("target")
+    with pytest.raises(AtlasModelError, match="checksum mismatch for model.pkl"):
+        import_bundle(io.BytesIO(bytes(data)))
+    assert os.listdir(target / "my-model") == []
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"not a bundle",
+        BUNDLE_MAGIC + struct.pack("<Q", 4) + b"\xff\xfe{]",
+        BUNDLE_MAGIC + struct.pack("<Q", 2) + b"[]",
+    ],
+)
+def test_import_invalid_bundle(repository, data):
+    repository("target")
+
+    with pytest.raises(AtlasModelError, match="Failed to read bundle"):
+        import_bundle(io.BytesIO(data))
+
+
+@pytest.mark.parametrize(
+    "field, value, message",
+    [
+        ("name", "../../owned.txt", "invalid file name"),
+        ("name", ".hidden", "invalid file name"),
+        ("model_name", "..", "invalid model name"),
+        ("model_name", "a\\b", "invalid model name"),
+        ("version", "", "invalid version"),
+        ("version", "banana", "invalid version 'banana'"),
+    ],
+)
+def test_import_bundle_unsafe_index(repository, tmp_path, field, value, message):
+    repository("source")
+    save_model({"weights": [1, 2, 3]}, "my-model")
+    bundle = io.BytesIO()
+    index = export_bundle("my-model", bundle)
+    data_offset = struct.calcsize("<8sQ") + len(json.dumps(index).encode("utf-8"))
+    if field == "name":
+        index["versions"][0]["files"][0]["name"] = value
+    else:
+        index["versions"][0][field] = value
+    index_bytes = json.dumps(index).encode("utf-8")
+    tampered_bundle = (
+        BUNDLE_MAGIC
+        + struct.pack("<Q", len(index_bytes))
+        + index_bytes
+        + bundle.getvalue()[data_offset:]
+    )
+
+    target = repository("target")
+    with pytest.raises(AtlasModelError, match=message):
+        import_bundle(io.BytesIO(tampered_bundle))
+    assert not target.exists()
+    assert not list(tmp_path.rglob("owned.txt"))
@@ -0,0 +1,156 @@
+import os
+
+import pytest
+
+from atlas.storage import (
+    AtlasStorageError,
+    LocalStorage,
+    StorageBackend,
+    TieredStorage,
+    build_storage,
+    parse_size,
+)
+
+
+def write_file(storage, model_name, version, file_name, data):
+    storage.create_version(model_name, version)
+    with storage.open_file(model_name, version, file_name, "wb") as file:
+        file.write(data)
+
+
+def test_parse_size():
+    assert parse_size(1024) == 1024
+    assert parse_size("512MB") == 512 * 1024**2
+    assert parse_size("1.5 KB") == 1536
+
+    with pytest.raises(AtlasStorageError, match="Failed to parse size 'lots'"):
+        parse_size("lots")
+
+
+def test_build_storage(tmp_path):
+    assert isinstance(build_storage(str(tmp_path / "local"), None), LocalStorage)
+
+    storage = build_storage(
+        str(tmp_path / "local"),
+        {"remote": str(tmp_path / "remote"), "cache_size": "1KB"},
+    )
+
+    assert isinstance(storage, TieredStorage)
+    assert storage.max_bytes == 1024
+
+
+def test_tiered_storage_write_through(tmp_path):
+    local = LocalStorage(str(tmp_path / "local"))
+    remote = LocalStorage(str(tmp_path / "remote"))
+    storage = TieredStorage(local, remote)
+
+    write_file(storage, "my-model", "0.0.1", "model.pkl", b"weights")
+
+    assert (tmp_path / "remote" / "my-model" / "0.0.1" / "model.pkl").read_bytes() == (
+        b"weights"
+    )
+    assert (tmp_path / "local" / "my-model" / "0.0.1" / "model.pkl").exists()
+    assert not storage.create_version("my-model", "0.0.1")
+
+
+def test_tiered_storage_read_through_and_eviction(tmp_path):
+    local = LocalStorage(str(tmp_path / "local"))
+    remote = LocalStorage(str(tmp_path / "remote"))
+    for version in ["0.0.1", "0.0.2", "0.0.3"]:
+        write_file(remote, "my-model", version, "model.pkl", b"x" * 100)
+    storage = TieredStorage(local, remote, max_bytes=250)
+
+    assert not storage.fetch(("my-model", "0.0.1", "model.pkl"))
+    assert storage.fetch(("my-model", "0.0.1", "model.pkl"))
+    with storage.open_file("my-model", "0.0.2", "model.pkl") as file:
+        assert file.read() == b"x" * 100
+    storage.fetch(("my-model", "0.0.1", "model.pkl"))
+    storage.fetch(("my-model", "0.0.3", "model.pkl"))
+
+    cached_versions = sorted(
+        path.parent.name for path in (tmp_path / "local").glob("my-model/*/model.pkl")
+    )
+    assert cached_versions == ["0.0.1", "0.0.3"]
+
+
+def test_tiered_storage_prefetch(tmp_path):
+    local = LocalStorage(str(tmp_path / "local"))
+    remote = LocalStorage(str(tmp_path / "remote"))
+    write_file(remote, "my-model", "0.0.1", "model.pkl", b"weights")
+    write_file(remote, "my-model", "0.0.1", "metrics.json", b"{}")
+    storage = TieredStorage(local, remote)
+
+    for future in storage.prefetch("my-model", ["0.0.1"]):
+        future.result()
+
+    assert sorted(local.list_files("my-model", "0.0.1")) == [
+        "metrics.json",
+        "model.pkl",
+    ]
+    assert storage.fetch(("my-model", "0.0.1", "model.pkl"))
+
+
+def test_tiered_storage_delete(tmp_path):
+    local = LocalStorage(str(tmp_path / "local"))
+    remote = LocalStorage(str(tmp_path / "remote"))
+    storage = TieredStorage(local, remote)
+    write_file(storage, "my-model", "0.0.1", "model.pkl", b"weights")
+    write_file(storage, "my-model", "0.0.2", "model.pkl", b"weights")
+
+    storage.delete("my-model", "0.0.1")
+
+    assert storage.list_versions("my-model") == ["0.0.2"]
+    assert local.list_versions("my-model") == ["0.0.2"]
+
+
+@pytest.mark.parametrize("tiered", [False, True])
+def test_staged_version(tmp_path, tiered):
+    storage = LocalStorage(str(tmp_path / "remote"))
+    if tiered:
+        storage = TieredStorage(LocalStorage(str(tmp_path / "local")), storage)
+    write_file(storage, "my-model", "0.0.1", "model.pkl", b"old")
+
+    staged_version = storage.stage_version("my-model")
+    with storage.open_file("my-model", staged_version, "model.pkl", "wb") as file:
+        file.write(b"new")
+
+    assert storage.list_versions("my-model") == ["0.0.1"]
+    assert not storage.commit_version("my-model", staged_version, "0.0.1")
+    assert storage.commit_version("my-model", staged_version, "0.0.2")
+    assert sorted(storage.list_versions("my-model")) == ["0.0.1", "0.0.2"]
+    with storage.open_file("my-model", "0.0.2", "model.pkl") as file:
+        assert file.read() == b"new"
+    assert sorted(os.listdir(tmp_path / "remote" / "my-model")) == ["0.0.1", "0.0.2"]
+
+
+def test_incomplete_storage_backend():
+    class ReadOnlyStorage(StorageBackend):
+        def is_available(self):
+            return True
+
+        def list_models(self):
+            return []
+
+        def list_versions(self, model_name):
+            return []
+
+    with pytest.raises(TypeError, match="commit_version"):
+        ReadOnlyStorage()
+
+
+def test_tiered_storage_read_evicted_after_fetch(tmp_path, monkeypatch):
+    local = LocalStorage(str(tmp_path / "local"))
+    remote = LocalStorage(str(tmp_path / "remote"))
+    write_file(remote, "my-model", "0.0.1", "model.pkl", b"x" * 100)
+    storage = TieredStorage(local, remote)
+    fetch = storage.fetch
+
+    def fetch_then_evict(key):
+        # Another thread evicts the file right after it is fetched.
+        fetch(key)
+        os.remove(local.path(*key))
+
+    monkeypatch.setattr(storage, "fetch", fetch_then_evict)
+
+    with storage.open_file("my-model", "0.0.1", "model.pkl") as file:
+        assert file.read() == b"x" * 100
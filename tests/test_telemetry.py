@@ -0,0 +1,115 @@
+import importlib
+import urllib.request
+
+import pytest
+
+from atlas.atlas_pipeline import AtlasPipeline, AtlasPipelineError
+from atlas.model import load_model, save_model
+from atlas.storage import LocalStorage
+from atlas.telemetry import REGISTRY, MetricsRegistry, configure_telemetry
+
+model_module = importlib.import_module("atlas.model")
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry(enabled=True)
+
+
+def test_render_counter_and_histogram(registry):
+    counter = registry.counter("requests_total", "Requests.", ["result"])
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=[0.1, 1.0])
+    counter.inc(result="hit")
+    counter.inc(2, result='mi"ss')
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    assert registry.render() == (
+        "# HELP latency_seconds Latency.\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{le="0.1"} 1\n'
+        'latency_seconds_bucket{le="1.0"} 2\n'
+        'latency_seconds_bucket{le="+Inf"} 3\n'
+        "latency_seconds_sum 5.55\n"
+        "latency_seconds_count 3\n"
+        "# HELP requests_total Requests.\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{result="hit"} 1.0\n'
+        'requests_total{result="mi\\"ss"} 2.0\n'
+    )
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests.")
+    histogram = registry.histogram("latency_seconds", "Latency.")
+    counter.inc()
+    with histogram.time():
+        pass
+
+    assert counter.collect() == []
+    assert histogram.collect() == []
+
+
+def test_write_textfile_and_http_server(registry, tmp_path):
+    registry.counter("requests_total", "Requests.").inc()
+    textfile_path = tmp_path / "metadata" / "metrics.prom"
+    registry.write_textfile(str(textfile_path))
+    server = registry.start_http_server(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+
+    assert body == textfile_path.read_text() == registry.render()
+
+
+def test_model_and_stage_metrics(tmp_path, monkeypatch):
+    monkeypatch.setattr(REGISTRY, "enabled", True)
+    monkeypatch.setattr(
+        model_module, "_storage", LocalStorage(str(tmp_path / "model_repository"))
+    )
+    (tmp_path / "ok.py").write_text("")
+    (tmp_path / "fail.py").write_text("raise ValueError('boom')")
+    project_stages = {
+        "ok": {
+            "script": str(tmp_path / "ok.py"),
+            "root": True,
+            "next_stages": ["fail"],
+        },
+        "fail": {"script": str(tmp_path / "fail.py")},
+    }
+
+    save_model([1, 2, 3], "my-model", parameters={"lr": 0.1})
+    load_model("my-model")
+    with pytest.raises(AtlasPipelineError):
+        AtlasPipeline(project_stages).run_atlas()
+    metrics = REGISTRY.render()
+    version_path = tmp_path / "model_repository" / "my-model" / "0.0.1"
+    pickle_size = (version_path / "model.pkl").stat().st_size
+    version_size = sum(path.stat().st_size for path in version_path.iterdir())
+
+    assert "atlas_model_save_seconds_count 1" in metrics
+    assert "atlas_model_load_seconds_count 1" in metrics
+    assert f"atlas_model_bytes_read_total {float(pickle_size)}" in metrics
+    assert f"atlas_model_bytes_written_total {float(version_size)}" in metrics
+    assert 'atlas_stage_runs_total{stage="ok",status="success"} 1.0' in metrics
+    assert 'atlas_stage_runs_total{stage="fail",status="failure"} 1.0' in metrics
+    assert 'atlas_stage_duration_seconds_count{stage="fail"} 1' in metrics
+
+
+def test_configure_telemetry_port_in_use(registry, monkeypatch, capsys):
+    server = registry.start_http_server(0)
+    port = server.server_address[1]
+    monkeypatch.setattr(REGISTRY, "enabled", True)
+    try:
+        textfile_path = configure_telemetry({"port": port, "textfile": "metrics.prom"})
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert textfile_path == "metrics.prom"
+    assert f"Failed to serve metrics on port {port}" in capsys.readouterr().out
@@ -0,0 +1,136 @@
+import importlib
+import time
+
+import pytest
+
+from atlas.storage import LocalStorage
+from atlas.tracking import AtlasTrackingError, MetricLogger, read_metrics_log
+
+model_module = importlib.import_module("atlas.model")
+tracking_module = importlib.import_module("atlas.tracking")
+
+
+def test_metric_logger(tmp_path):
+    log_path = str(tmp_path / "run.metrics")
+    metric_logger = MetricLogger(log_path, flush_size=3)
+    for step in range(10):
+        metric_logger.log("loss", 1.0 / (step + 1), step)
+    metric_logger.log("accuracy", 0.5)
+    metric_logger.log("accuracy", 0.75)
+    metric_logger.close()
+
+    series = read_metrics_log(log_path)
+
+    steps, values = series["loss"]
+    assert list(steps) == list(range(10))
+    assert values[3] == 0.25
+    assert list(series["accuracy"][0]) == [0, 1]
+    assert list(series["accuracy"][1]) == [0.5, 0.75]
+
+
+def test_metric_log_truncated_frame(tmp_path):
+    log_path = tmp_path / "run.metrics"
+    metric_logger = MetricLogger(str(log_path))
+    metric_logger.log("loss", 1.0)
+    metric_logger.flush()
+    metric_logger.log("loss", 0.5)
+    metric_logger.close()
+
+    data = log_path.read_bytes()
+    log_path.write_bytes(data[:-3])
+
+    assert list(read_metrics_log(str(log_path))["loss"][1]) == [1.0]
+
+
+def test_metric_log_resumed_after_partial_frame(tmp_path):
+    log_path = tmp_path / "run.metrics"
+    metric_logger = MetricLogger(str(log_path))
+    metric_logger.log("loss", 1.0)
+    metric_logger.close()
+    with open(log_path, "ab") as file:
+        file.write(b"\x10\x00\x00\x00\xff\xff")
+
+    resumed_logger = MetricLogger(str(log_path))
+    resumed_logger.log("loss", 0.5)
+    resumed_logger.log("loss", 0.25)
+    resumed_logger.close()
+
+    steps, values = read_metrics_log(str(log_path))["loss"]
+    assert list(steps) == [0, 1, 2]
+    assert list(values) == [1.0, 0.5, 0.25]
+
+
+def test_save_model_links_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        model_module, "_storage", LocalStorage(str(tmp_path / "model_repository"))
+    )
+    monkeypatch.setattr(tracking_module, "metadata_path", str(tmp_path / "metadata"))
+    monkeypatch.setattr(tracking_module, "_run_id", "test-run")
+    monkeypatch.setattr(tracking_module, "_logger", None)
+
+    tracking_module.log_metrics({"loss": 0.3, "accuracy": 0.9}, step=5)
+    model_module.save_model({"weights": [1, 2]}, "my-model")
+    run_id = model_module.get_model_run_id("my-model", "0.0.1")
+    tracking_module.get_metric_logger().close()
+
+    assert run_id == "test-run"
+    series = tracking_module.read_metrics(run_id)
+    assert list(series["loss"][0]) == [5]
+    assert list(series["accuracy"][1]) == [0.9]
+
+
+def test_metric_log_reopened_and_shared(tmp_path):
+    log_path = str(tmp_path / "run.metrics")
+    metric_logger = MetricLogger(log_path)
+    metric_logger.log("loss", 1.0)
+    metric_logger.log("loss", 0.5)
+    metric_logger.close()
+
+    resumed_logger = MetricLogger(log_path)
+    other_logger = MetricLogger(log_path)
+    resumed_logger.log("loss", 0.25)
+    other_logger.log("accuracy", 0.9)
+    other_logger.flush()
+    resumed_logger.log("loss", 0.125)
+    resumed_logger.close()
+    other_logger.close()
+
+    series = read_metrics_log(log_path)
+
+    assert list(series["loss"][0]) == [0, 1, 2, 3]
+    assert list(series["loss"][1]) == [1.0, 0.5, 0.25, 0.125]
+    assert list(series["accuracy"][1]) == [0.9]
+
+
+def test_metric_logger_rejects_bad_points(tmp_path):
+    log_path = str(tmp_path / "run.metrics")
+    metric_logger = MetricLogger(log_path, flush_interval=0.01)
+
+    with pytest.raises(AtlasTrackingError, match="Invalid value for metric loss"):
+        metric_logger.log("loss", "nan?")
+    with pytest.raises(AtlasTrackingError, match="Invalid step for metric loss"):
+        metric_logger.log("loss", 1.0, step=2**63)
+    metric_logger.log("loss", 1.0)
+    time.sleep(0.05)
+
+    assert metric_logger._thread.is_alive()  # pylint: disable=protected-access
+    metric_logger.close()
+    assert list(read_metrics_log(log_path)["loss"][1]) == [1.0]
+
+
+def test_start_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracking_module, "metadata_path", str(tmp_path / "metadata"))
+    monkeypatch.delenv(tracking_module.RUN_ID_ENV, raising=False)
+    monkeypatch.setattr(tracking_module, "_run_id", None)
+    monkeypatch.setattr(tracking_module, "_logger", None)
+
+    tracking_module.log_metric("loss", 1.0)
+    first_run_id = tracking_module.get_active_run_id()
+    tracking_module.start_run()
+    tracking_module.log_metric("loss", 0.5)
+    second_run_id = tracking_module.get_active_run_id()
+    tracking_module.start_run()
+
+    assert first_run_id != second_run_id
+    assert list(tracking_module.read_metrics(first_run_id)["loss"][1]) == [1.0]
+    assert list(tracking_module.read_metrics(second_run_id)["loss"][0]) == [0]